@@ -196,6 +196,10 @@ class AudioCapture:
         if not self.is_recording:
             self._detect_voice_activity_for_monitoring(indata)
     
+    def check_input_device(self) -> None:
+        """Validate the input settings, initialising the audio device before the first recording"""
+        sd.check_input_settings(samplerate=self.sample_rate, channels=self.channels)
+    
     def start_recording(self) -> None:
         """Start recording audio"""
         if self.is_recording:
@@ -451,6 +455,19 @@ class AudioCapture:
         self.logger.info(f"Saved recording to {filepath} ({len(full_audio) / self.sample_rate:.2f}s, energy: {audio_energy:.6f})")
         return str(filepath)
     
+    def get_pcm_float32(self) -> np.ndarray:
+        """Return the recorded audio as one mono float32 array, without writing a file"""
+        if not self.audio_data:
+            raise ValueError("No audio data recorded")
+        
+        # Concatenate all audio chunks; sounddevice already delivers float32 in [-1, 1]
+        full_audio = np.concatenate(self.audio_data, axis=0)
+        if full_audio.ndim > 1:
+            full_audio = full_audio.mean(axis=1) if full_audio.shape[1] > 1 else full_audio.ravel()
+        
+        self.logger.debug(f"Recorded {len(full_audio) / self.sample_rate:.2f}s of audio in memory")
+        return full_audio.astype(np.float32, copy=False)
+    
     def get_recording_duration(self) -> float:
         """Get the duration of the current recording"""
         if not self.recording_start_time:
@@ -72,7 +72,9 @@ class Config:
             },
             'whisper': {
                 'model': 'base',
-                'language': None
+                'language': None,
+                'device': 'auto',
+                'fp16': True
             },
             'audio': {
                 'sample_rate': 16000,
@@ -82,7 +84,7 @@ class Config:
             'output': {
                 'auto_paste': True,
                 'copy_to_clipboard': True,
-                'clear_clipboard_first': False
+                'paste_settle_ms': 20
             },
             'feedback': {
                 'audio_notification': True,
@@ -141,6 +143,14 @@ class Config:
     def whisper_accent(self) -> Optional[str]:
         return self.get('whisper.accent')
     
+    @property
+    def whisper_device(self) -> str:
+        return self.get('whisper.device', 'auto')
+    
+    @property
+    def whisper_fp16(self) -> bool:
+        return self.get('whisper.fp16', True)
+    
     @property
     def audio_sample_rate(self) -> int:
         return self.get('audio.sample_rate', 16000)
@@ -166,8 +176,8 @@ class Config:
         return self.get('output.copy_to_clipboard', True)
     
     @property
-    def clear_clipboard_first(self) -> bool:
-        return self.get('output.clear_clipboard_first', False)
+    def paste_settle_ms(self) -> int:
+        return self.get('output.paste_settle_ms', 20)
     
     @property
     def audio_notification(self) -> bool:
@@ -2,6 +2,7 @@
 Main application for WhisperControl
 """
 
+import gc
 import logging
 import sys
 import time
@@ -59,6 +60,10 @@ class WhisperControl:
         # Setup callbacks
         self._setup_callbacks()
         
+        # Model, handlers and lookup tables live for the whole run; freeze them
+        # into the permanent generation so later collections do not rescan them
+        gc.freeze()
+        
         self.logger.info("WhisperControl initialized")
     
     def _setup_logging(self) -> logging.Logger:
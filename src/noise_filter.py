@@ -3,8 +3,9 @@ Noise filter to detect and ignore accidental sounds like keyboard/mouse clicks
 """
 
 import numpy as np
+import scipy.signal
 import logging
-from typing import Tuple
+from typing import Tuple, Optional
 
 
 class NoiseFilter:
@@ -23,10 +24,23 @@ class NoiseFilter:
     - Typing sequence → Multiple short bursts → FILTERED
     """
     
-    def __init__(self, sample_rate: int = 16000):
+    def __init__(self, sample_rate: int = 16000, feature_sr: Optional[int] = None):
         self.sample_rate = sample_rate
         self.logger = logging.getLogger(__name__)
         
+        # Optional reduced rate for feature extraction (e.g. 8000). All features
+        # are ratios, so thresholds below are unchanged by decimation.
+        self.feature_rate = sample_rate
+        self._decimation_factor = 1
+        self._decimation_fir: Optional[np.ndarray] = None
+        if feature_sr and sample_rate > feature_sr and sample_rate % feature_sr == 0:
+            self.feature_rate = feature_sr
+            self._decimation_factor = sample_rate // feature_sr
+            # 32-tap Kaiser-windowed anti-aliasing low-pass at 90% of the new Nyquist
+            self._decimation_fir = scipy.signal.firwin(
+                32, 0.45 * feature_sr, window=('kaiser', 8.0), fs=sample_rate
+            )
+        
         # Characteristics of keyboard/mouse clicks
         self.click_max_duration_ms = 50  # Clicks are very short (<50ms)
         self.click_min_duration_ms = 5   # Minimum click duration
@@ -47,20 +61,47 @@ class NoiseFilter:
         
         # Mechanical keyboard specific: very sharp attack (sudden onset)
         self.mechanical_keyboard_attack_threshold = 0.3  # Very sharp attack characteristic
+        
+        # Per-call constants, computed once
+        self._inv_sr = 1.0 / self.feature_rate
+        self._click_energy_x2 = self.click_energy_threshold * 2
+        self._eps = 1e-4  # Guards energy ratios against division by zero
+        
+        # Chunks shorter than this use O(N) time-domain substitutes for the FFT
+        self.small_fft_threshold = 256
+        # 2nd-order Butterworth high-pass at 2kHz for the high/low energy split;
+        # at rates of 4kHz or less there is no band above 2kHz to keep
+        self._hp_ba: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        if self.feature_rate > 4000:
+            self._hp_ba = scipy.signal.butter(2, 2000 / (self.feature_rate / 2), btype='high')
     
     def is_click_or_noise(self, audio_chunk: np.ndarray) -> bool:
-        """Detect if audio chunk is a keyboard/mouse click or other noise"""
+        """Detect if audio chunk is a keyboard/mouse click or other noise
+        
+        Input is validated here once; the private helpers below assume a
+        non-empty 1-D floating-point chunk and do not guard themselves.
+        """
         try:
-            if len(audio_chunk) == 0:
+            if audio_chunk.size == 0:
                 return True  # Empty chunk is noise
             
             # Convert to mono if stereo
-            if len(audio_chunk.shape) > 1:
+            if audio_chunk.ndim > 1:
                 audio_chunk = np.mean(audio_chunk, axis=1)
+            if audio_chunk.ndim != 1:
+                return False
+            
+            # Integer PCM would overflow in the energy dot products
+            if audio_chunk.dtype.kind != 'f':
+                audio_chunk = audio_chunk.astype(np.float32)
             
             # Calculate duration
             duration_ms = (len(audio_chunk) / self.sample_rate) * 1000
             
+            # Decimate to the feature rate; duration is already taken from the input
+            if self._decimation_fir is not None:
+                audio_chunk = self._decimate(audio_chunk)
+            
             # Longer sounds (>100ms) are very likely speech, be less aggressive
             if duration_ms > self.speech_min_duration_ms:
                 # Only filter if it's clearly a click pattern (very sharp transient)
@@ -83,9 +124,19 @@ class NoiseFilter:
             self.logger.debug(f"Error in noise detection: {e}")
             return False  # On error, assume it's not noise (safer)
     
+    def _decimate(self, audio_chunk: np.ndarray) -> np.ndarray:
+        """Low-pass filter and downsample a validated chunk to ``feature_rate``"""
+        if len(audio_chunk) < len(self._decimation_fir):
+            # Too short to filter without the output growing to the tap count
+            return audio_chunk[::self._decimation_factor]
+        filtered = np.convolve(audio_chunk, self._decimation_fir, mode='same')
+        return filtered[::self._decimation_factor]
+    
     def _analyze_click_characteristics(self, audio_chunk: np.ndarray, duration_ms: float) -> bool:
         """Analyze audio characteristics to determine if it's a click
         
+        Expects a validated 1-D float chunk (see is_click_or_noise).
+        
         Example analysis:
         - Mechanical keyboard press: 
           * Duration: ~15ms
@@ -105,229 +156,225 @@ class NoiseFilter:
           * Attack: Gradual (0.1)
           → Result: NOT_CLICK (passed through)
         """
-        try:
-            # Calculate energy
-            energy = np.mean(audio_chunk ** 2)
-            
-            # Calculate zero-crossing rate
-            zcr = self._calculate_zcr(audio_chunk)
-            
-            # Calculate frequency characteristics
-            high_freq_ratio = self._calculate_high_freq_ratio(audio_chunk)
-            
-            # Calculate spectral centroid (brightness)
-            spectral_centroid = self._calculate_spectral_centroid(audio_chunk)
-            
-            # Calculate attack sharpness (mechanical keyboards have very sharp attacks)
-            attack_sharpness = self._calculate_attack_sharpness(audio_chunk)
-            
-            # Click characteristics (mechanical keyboard example):
-            # 1. Very short duration (< 50ms) - "click" happens in ~15-30ms
-            # 2. High energy in short burst - mechanical keys are LOUD
-            # 3. High zero-crossing rate (sharp transient) - sudden "click" sound
-            # 4. High frequency content - the "click" is high-pitched
-            # 5. High spectral centroid - bright, sharp sound
-            # 6. Very sharp attack - sound starts instantly
-            
-            is_click = False
-            click_score = 0  # Score how "click-like" this is
-            
-            # Very short duration is a strong indicator
-            if duration_ms < 30:
-                click_score += 3
-                if duration_ms < 20:
-                    click_score += 2  # Very short = more likely click
-            
-            # High energy in short burst
-            if energy > self.click_energy_threshold:
-                click_score += 2
-                if energy > self.click_energy_threshold * 2:
-                    click_score += 1  # Very loud = more likely mechanical keyboard
-            
-            # High zero-crossing rate (sharp transient)
-            if zcr > self.click_zcr_threshold:
-                click_score += 2
-                if zcr > 0.6:
-                    click_score += 1  # Very sharp
-            
-            # High frequency content (mechanical keyboards are "clicky")
-            if high_freq_ratio > self.click_high_freq_ratio:
-                click_score += 2
-                if high_freq_ratio > 0.5:
-                    click_score += 1  # Very high frequency = clicky sound
-            
-            # High spectral centroid (bright sound)
-            if spectral_centroid > 2000:
-                click_score += 1
-                if spectral_centroid > 3000:
-                    click_score += 1  # Very bright = mechanical keyboard
-            
-            # Very sharp attack (characteristic of mechanical keyboards)
-            if attack_sharpness > self.mechanical_keyboard_attack_threshold:
-                click_score += 2  # Strong indicator of mechanical keyboard
-            
-            # If it's a sharp transient, that's a strong indicator
-            if self._is_sharp_transient(audio_chunk):
-                click_score += 3
-            
-            # Decision: If score is high enough, it's a click
-            # Score of 5+ = likely click, 8+ = definitely click
-            if click_score >= 5:
-                is_click = True
-                self.logger.debug(f"Detected click: duration={duration_ms:.1f}ms, energy={energy:.4f}, "
-                                f"zcr={zcr:.2f}, high_freq={high_freq_ratio:.2f}, "
-                                f"centroid={spectral_centroid:.0f}Hz, attack={attack_sharpness:.2f}, "
-                                f"score={click_score}")
-            
-            return is_click
-            
-        except Exception as e:
-            self.logger.debug(f"Error analyzing click characteristics: {e}")
-            return False
+        # Calculate energy
+        energy = np.mean(audio_chunk ** 2)
+        
+        # Calculate zero-crossing rate
+        zcr = self._calculate_zcr(audio_chunk)
+        
+        # Calculate frequency characteristics
+        high_freq_ratio = self._calculate_high_freq_ratio(audio_chunk)
+        
+        # Calculate spectral centroid (brightness)
+        spectral_centroid = self._calculate_spectral_centroid(audio_chunk)
+        
+        # Calculate attack sharpness (mechanical keyboards have very sharp attacks)
+        attack_sharpness = self._calculate_attack_sharpness(audio_chunk)
+        
+        # Click characteristics (mechanical keyboard example):
+        # 1. Very short duration (< 50ms) - "click" happens in ~15-30ms
+        # 2. High energy in short burst - mechanical keys are LOUD
+        # 3. High zero-crossing rate (sharp transient) - sudden "click" sound
+        # 4. High frequency content - the "click" is high-pitched
+        # 5. High spectral centroid - bright, sharp sound
+        # 6. Very sharp attack - sound starts instantly
+        
+        is_click = False
+        click_score = 0  # Score how "click-like" this is
+        
+        # Very short duration is a strong indicator
+        if duration_ms < 30:
+            click_score += 3
+            if duration_ms < 20:
+                click_score += 2  # Very short = more likely click
+        
+        # High energy in short burst
+        if energy > self.click_energy_threshold:
+            click_score += 2
+            if energy > self._click_energy_x2:
+                click_score += 1  # Very loud = more likely mechanical keyboard
+        
+        # High zero-crossing rate (sharp transient)
+        if zcr > self.click_zcr_threshold:
+            click_score += 2
+            if zcr > 0.6:
+                click_score += 1  # Very sharp
+        
+        # High frequency content (mechanical keyboards are "clicky")
+        if high_freq_ratio > self.click_high_freq_ratio:
+            click_score += 2
+            if high_freq_ratio > 0.5:
+                click_score += 1  # Very high frequency = clicky sound
+        
+        # High spectral centroid (bright sound)
+        if spectral_centroid > 2000:
+            click_score += 1
+            if spectral_centroid > 3000:
+                click_score += 1  # Very bright = mechanical keyboard
+        
+        # Very sharp attack (characteristic of mechanical keyboards)
+        if attack_sharpness > self.mechanical_keyboard_attack_threshold:
+            click_score += 2  # Strong indicator of mechanical keyboard
+        
+        # If it's a sharp transient, that's a strong indicator
+        if self._is_sharp_transient(audio_chunk):
+            click_score += 3
+        
+        # Decision: If score is high enough, it's a click
+        # Score of 5+ = likely click, 8+ = definitely click
+        if click_score >= 5:
+            is_click = True
+            self.logger.debug(f"Detected click: duration={duration_ms:.1f}ms, energy={energy:.4f}, "
+                            f"zcr={zcr:.2f}, high_freq={high_freq_ratio:.2f}, "
+                            f"centroid={spectral_centroid:.0f}Hz, attack={attack_sharpness:.2f}, "
+                            f"score={click_score}")
+        
+        return is_click
     
     def _is_short_burst(self, audio_chunk: np.ndarray, duration_ms: float) -> bool:
-        """Check if short audio is a burst (click) or sustained sound"""
-        try:
-            # Calculate energy over time
-            frame_size = int(self.sample_rate * 0.01)  # 10ms frames
-            frames = []
-            
-            for i in range(0, len(audio_chunk) - frame_size, frame_size):
-                frame = audio_chunk[i:i + frame_size]
-                frames.append(np.mean(frame ** 2))
-            
-            if len(frames) == 0:
-                return False
-            
-            # Clicks have energy concentrated in one or two frames
-            # Speech has more distributed energy
-            max_energy = max(frames)
-            mean_energy = np.mean(frames)
-            
-            # If max energy is much higher than mean, it's likely a click
-            if max_energy > mean_energy * 3:
-                return True
-            
-            # Check energy decay - clicks decay quickly, speech is more sustained
-            if len(frames) >= 3:
-                energy_decay = (frames[0] + frames[1]) / (frames[-2] + frames[-1] + 0.0001)
-                if energy_decay > 5:  # Rapid decay indicates click
-                    return True
-            
-            return False
-            
-        except Exception as e:
-            self.logger.debug(f"Error checking short burst: {e}")
+        """Check if short audio is a burst (click) or sustained sound
+        
+        Expects a validated 1-D float chunk (see is_click_or_noise).
+        """
+        # Calculate energy over time
+        frame_size = int(self.feature_rate * 0.01)  # 10ms frames
+        frames = []
+        
+        for i in range(0, len(audio_chunk) - frame_size, frame_size):
+            frame = audio_chunk[i:i + frame_size]
+            frames.append(np.mean(frame ** 2))
+        
+        if len(frames) == 0:
             return False
+        
+        # Clicks have energy concentrated in one or two frames
+        # Speech has more distributed energy
+        max_energy = max(frames)
+        mean_energy = np.mean(frames)
+        
+        # If max energy is much higher than mean, it's likely a click
+        if max_energy > mean_energy * 3:
+            return True
+        
+        # Check energy decay - clicks decay quickly, speech is more sustained
+        if len(frames) >= 3:
+            energy_decay = (frames[0] + frames[1]) / (frames[-2] + frames[-1] + self._eps)
+            if energy_decay > 5:  # Rapid decay indicates click
+                return True
+        
+        return False
     
     def _calculate_zcr(self, audio_chunk: np.ndarray) -> float:
-        """Calculate zero-crossing rate"""
-        try:
-            if len(audio_chunk) < 2:
-                return 0.0
-            
-            # Count sign changes
-            sign_changes = np.sum(np.diff(np.sign(audio_chunk)) != 0)
-            zcr = sign_changes / len(audio_chunk)
-            
-            return zcr
-            
-        except Exception:
+        """Calculate zero-crossing rate of a validated 1-D float chunk"""
+        if len(audio_chunk) < 2:
             return 0.0
+        
+        # Count sign changes
+        sign_changes = np.sum(np.diff(np.sign(audio_chunk)) != 0)
+        zcr = sign_changes / len(audio_chunk)
+        
+        return zcr
     
     def _calculate_high_freq_ratio(self, audio_chunk: np.ndarray) -> float:
-        """Calculate ratio of high-frequency energy to total energy"""
-        try:
-            if len(audio_chunk) < 64:
-                return 0.0
-            
-            # Compute FFT
-            fft = np.fft.rfft(audio_chunk)
-            fft_magnitude = np.abs(fft)
-            
-            # Frequency bins
-            freqs = np.fft.rfftfreq(len(audio_chunk), 1.0 / self.sample_rate)
-            
-            # High frequency range (above 2kHz)
-            high_freq_mask = freqs > 2000
-            low_freq_mask = freqs <= 2000
-            
-            high_freq_energy = np.sum(fft_magnitude[high_freq_mask] ** 2)
-            total_energy = np.sum(fft_magnitude ** 2)
-            
-            if total_energy == 0:
+        """Calculate ratio of high-frequency energy to total energy
+        
+        Expects a validated 1-D float chunk (see is_click_or_noise).
+        """
+        if len(audio_chunk) < 64:
+            return 0.0
+        
+        # Short chunks: energy after a 2kHz high-pass instead of a transform
+        if len(audio_chunk) < self.small_fft_threshold:
+            total_energy = float(audio_chunk @ audio_chunk)
+            if total_energy == 0 or self._hp_ba is None:
                 return 0.0
-            
-            return high_freq_energy / total_energy
-            
-        except Exception as e:
-            self.logger.debug(f"Error calculating high freq ratio: {e}")
+            high_passed = scipy.signal.lfilter(*self._hp_ba, audio_chunk)
+            return float(high_passed @ high_passed) / total_energy
+        
+        # Compute FFT
+        fft = np.fft.rfft(audio_chunk)
+        fft_magnitude = np.abs(fft)
+        
+        # Frequency bins
+        freqs = np.fft.rfftfreq(len(audio_chunk), self._inv_sr)
+        
+        # High frequency range (above 2kHz)
+        high_freq_mask = freqs > 2000
+        low_freq_mask = freqs <= 2000
+        
+        high_freq_energy = np.sum(fft_magnitude[high_freq_mask] ** 2)
+        total_energy = np.sum(fft_magnitude ** 2)
+        
+        if total_energy == 0:
             return 0.0
+        
+        return high_freq_energy / total_energy
     
     def _calculate_spectral_centroid(self, audio_chunk: np.ndarray) -> float:
-        """Calculate spectral centroid (brightness)"""
-        try:
-            if len(audio_chunk) < 64:
-                return 0.0
-            
-            # Compute FFT
-            fft = np.fft.rfft(audio_chunk)
-            fft_magnitude = np.abs(fft)
-            
-            # Frequency bins
-            freqs = np.fft.rfftfreq(len(audio_chunk), 1.0 / self.sample_rate)
-            
-            # Calculate weighted average frequency
-            magnitude_sum = np.sum(fft_magnitude)
-            if magnitude_sum == 0:
-                return 0.0
-            
-            centroid = np.sum(freqs * fft_magnitude) / magnitude_sum
-            
-            return centroid
-            
-        except Exception as e:
-            self.logger.debug(f"Error calculating spectral centroid: {e}")
+        """Calculate spectral centroid (brightness) of a validated 1-D float chunk"""
+        if len(audio_chunk) < 64:
             return 0.0
+        
+        # Short chunks: approximate from zero-crossing rate (Kedem's relation)
+        if len(audio_chunk) < self.small_fft_threshold:
+            return self._calculate_zcr(audio_chunk) * self.feature_rate / 2
+        
+        # Compute FFT
+        fft = np.fft.rfft(audio_chunk)
+        fft_magnitude = np.abs(fft)
+        
+        # Frequency bins
+        freqs = np.fft.rfftfreq(len(audio_chunk), self._inv_sr)
+        
+        # Calculate weighted average frequency
+        magnitude_sum = np.sum(fft_magnitude)
+        if magnitude_sum == 0:
+            return 0.0
+        
+        centroid = np.sum(freqs * fft_magnitude) / magnitude_sum
+        
+        return centroid
     
     def _calculate_attack_sharpness(self, audio_chunk: np.ndarray) -> float:
         """Calculate how sharp the attack is (onset of sound)
         
+        Expects a validated 1-D float chunk (see is_click_or_noise).
+        
         Example:
         - Mechanical keyboard: Attack happens in first 5-10ms, very sharp (0.4-0.6)
         - Human speech: Attack is gradual over 20-50ms, smooth (0.1-0.2)
         """
-        try:
-            if len(audio_chunk) < 20:
-                return 0.0
-            
-            # Look at the first 20% of the audio chunk (the attack)
-            attack_length = max(10, len(audio_chunk) // 5)
-            attack_portion = audio_chunk[:attack_length]
-            rest_portion = audio_chunk[attack_length:]
-            
-            if len(rest_portion) == 0:
-                return 0.0
-            
-            # Calculate energy in attack vs rest
-            attack_energy = np.mean(attack_portion ** 2)
-            rest_energy = np.mean(rest_portion ** 2) if len(rest_portion) > 0 else 0.001
-            
-            # Sharp attack = high energy at start relative to rest
-            if rest_energy > 0:
-                sharpness = attack_energy / (rest_energy + 0.0001)
-                # Normalize to 0-1 range
-                return min(1.0, sharpness / 10.0)
-            
+        n = len(audio_chunk)
+        # Look at the first 20% of the audio chunk (the attack)
+        attack_length = max(10, n // 5)
+        
+        if n < 20:
             return 0.0
-            
-        except Exception as e:
-            self.logger.debug(f"Error calculating attack sharpness: {e}")
+        
+        # Attack/rest are views; dot products avoid squared temporaries
+        attack_portion = audio_chunk[:attack_length]
+        rest_portion = audio_chunk[attack_length:]
+        
+        if len(rest_portion) == 0:
             return 0.0
+        
+        # Calculate energy in attack vs rest
+        attack_energy = float(attack_portion @ attack_portion) / attack_length
+        rest_energy = float(rest_portion @ rest_portion) / (n - attack_length)
+        
+        # Sharp attack = high energy at start relative to rest
+        if rest_energy > 0:
+            sharpness = attack_energy / (rest_energy + self._eps)
+            # Normalize to 0-1 range
+            return min(1.0, sharpness / 10.0)
+        
+        return 0.0
     
     def _is_sharp_transient(self, audio_chunk: np.ndarray) -> bool:
         """Detect sharp transients (characteristic of clicks)
         
+        Expects a validated 1-D float chunk (see is_click_or_noise).
+        
         Example:
         - Mechanical keyboard: Sudden jump from silence to loud click
           * Derivative ratio: 15-30x (very sharp)
@@ -339,38 +386,33 @@ class NoiseFilter:
           * Energy spike: 3-8x (gradual)
           → Result: NOT_SHARP_TRANSIENT
         """
-        try:
-            if len(audio_chunk) < 10:
-                return False
-            
-            # Calculate first derivative (rate of change)
-            derivative = np.diff(audio_chunk)
-            
-            # Sharp transients have high derivative values
-            max_derivative = np.max(np.abs(derivative))
-            mean_derivative = np.mean(np.abs(derivative))
-            
-            # If max derivative is much higher than mean, it's a sharp transient
-            # Mechanical keyboards: ratio of 10-30x is common
-            if mean_derivative > 0:
-                if max_derivative > mean_derivative * 10:
-                    return True
-            
-            # Check for sudden energy spikes
-            energy = audio_chunk ** 2
-            max_energy = np.max(energy)
-            mean_energy = np.mean(energy)
-            
-            # Mechanical keyboards: sudden energy burst, ratio of 20-50x
-            if mean_energy > 0:
-                if max_energy > mean_energy * 20:
-                    return True
-            
-            return False
-            
-        except Exception as e:
-            self.logger.debug(f"Error detecting sharp transient: {e}")
+        if len(audio_chunk) < 10:
             return False
+        
+        # Calculate first derivative (rate of change)
+        derivative = np.diff(audio_chunk)
+        
+        # Sharp transients have high derivative values
+        max_derivative = np.max(np.abs(derivative))
+        mean_derivative = np.mean(np.abs(derivative))
+        
+        # If max derivative is much higher than mean, it's a sharp transient
+        # Mechanical keyboards: ratio of 10-30x is common
+        if mean_derivative > 0:
+            if max_derivative > mean_derivative * 10:
+                return True
+        
+        # Check for sudden energy spikes
+        energy = audio_chunk ** 2
+        max_energy = np.max(energy)
+        mean_energy = np.mean(energy)
+        
+        # Mechanical keyboards: sudden energy burst, ratio of 20-50x
+        if mean_energy > 0:
+            if max_energy > mean_energy * 20:
+                return True
+        
+        return False
     
     def filter_audio(self, audio_chunk: np.ndarray) -> Tuple[np.ndarray, bool]:
         """Filter audio and return (filtered_audio, is_noise)"""
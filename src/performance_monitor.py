@@ -2,12 +2,15 @@
 Performance monitoring and optimization system
 """
 
+import gc
 import time
 import logging
 import threading
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
-from collections import deque
+from collections import deque, defaultdict
+from itertools import islice
+import numpy as np
 import psutil
 import os
 
@@ -17,7 +20,7 @@ class PerformanceMetric:
     """Represents a performance metric"""
     name: str
     value: float
-    timestamp: float
+    timestamp: int  # time.monotonic_ns()
     unit: str = ""
     category: str = "general"
 
@@ -30,10 +33,41 @@ class PerformanceStats:
     total_time: float = 0.0
     min_time: float = float('inf')
     max_time: float = 0.0
-    avg_time: float = 0.0
     recent_times: deque = field(default_factory=lambda: deque(maxlen=100))
     error_count: int = 0
     last_error: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    
+    @property
+    def avg_time(self) -> float:
+        """Mean execution time, derived on read rather than on every call"""
+        return self.total_time / self.total_calls if self.total_calls else 0.0
+    
+    def reset(self) -> None:
+        """Zero all counters in place so bound references stay valid"""
+        with self._lock:
+            self.total_calls = 0
+            self.total_time = 0.0
+            self.min_time = float('inf')
+            self.max_time = 0.0
+            self.recent_times.clear()
+            self.error_count = 0
+            self.last_error = None
+    
+    def snapshot(self, into: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Copy the counters under the lock for consistent reads
+        
+        Writes into ``into`` when given, so a cached dict can be refreshed in place.
+        """
+        target = {} if into is None else into
+        with self._lock:
+            target["total_calls"] = self.total_calls
+            target["avg_time"] = self.avg_time
+            target["min_time"] = self.min_time
+            target["max_time"] = self.max_time
+            target["error_count"] = self.error_count
+            target["last_error"] = self.last_error
+        return target
 
 
 class PerformanceMonitor:
@@ -45,9 +79,36 @@ class PerformanceMonitor:
         
         # Performance tracking
         self.stats: Dict[str, PerformanceStats] = {}
-        self.metrics: List[PerformanceMetric] = []
+        
+        # Metric ring buffer as preallocated parallel arrays (struct-of-arrays).
+        # Slot i % max_metrics holds the i-th metric; live slots are [_tail, _head).
+        self.max_metrics = 1000
+        self._ts = np.empty(self.max_metrics, dtype=np.int64)  # monotonic ns
+        self._val = np.empty(self.max_metrics, dtype=np.float64)
+        self._name: List[Optional[str]] = [None] * self.max_metrics
+        self._unit: List[str] = [""] * self.max_metrics
+        self._category: List[str] = [""] * self.max_metrics
+        self._head = 0
+        self._tail = 0
+        self._metrics_lock = threading.Lock()
+        
+        # Per-name ring positions of the most recent values, for vectorized averages
+        self.metric_window = 10
+        self._name_idx: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.metric_window))
+        
         self.is_monitoring = False
         self.monitor_thread: Optional[threading.Thread] = None
+        self._stop_evt = threading.Event()
+        
+        # Monitor cadence: active while any metric is near its threshold, idle otherwise
+        self.active_interval = 1.0
+        self.idle_interval = 5.0
+        self._base_interval = self.active_interval
+        self._tick_interval = self.active_interval
+        
+        # Self-throttle: back off while a tick costs more than tick_budget seconds
+        self.tick_budget = 0.05
+        self.max_interval = 10.0
         
         # Performance thresholds
         self.thresholds = {
@@ -59,10 +120,24 @@ class PerformanceMonitor:
             'cpu_usage': 90.0,       # percentage
         }
         
+        # Report refreshed in place by get_performance_report
+        self._report_cache: Dict[str, Any] = {
+            "timestamp": 0.0,
+            "components": {},
+            "system_metrics": {},
+            "recommendations": []
+        }
+        
         # Optimization settings
         self.optimization_enabled = True
         self.auto_optimize = True
         
+        # Cached process handle; prime CPU counters so later non-blocking reads
+        # return the delta since the previous tick
+        self._proc = psutil.Process(os.getpid())
+        psutil.cpu_percent(interval=None)
+        self._proc.cpu_percent(interval=None)
+        
         # Start monitoring
         self.start_monitoring()
     
@@ -72,6 +147,7 @@ class PerformanceMonitor:
             return
         
         self.is_monitoring = True
+        self._stop_evt.clear()
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
         
@@ -80,6 +156,7 @@ class PerformanceMonitor:
     def stop_monitoring(self) -> None:
         """Stop performance monitoring"""
         self.is_monitoring = False
+        self._stop_evt.set()  # Wakes the loop immediately
         if self.monitor_thread:
             self.monitor_thread.join(timeout=1.0)
         
@@ -87,10 +164,15 @@ class PerformanceMonitor:
     
     def _monitor_loop(self) -> None:
         """Main monitoring loop"""
-        while self.is_monitoring:
+        while not self._stop_evt.is_set():
             try:
+                start = time.perf_counter_ns()
+                
+                # One clock read per tick, shared by sampling and cleanup
+                now = time.monotonic_ns()
+                
                 # Collect system metrics
-                self._collect_system_metrics()
+                self._collect_system_metrics(now)
                 
                 # Check performance thresholds
                 self._check_thresholds()
@@ -100,66 +182,103 @@ class PerformanceMonitor:
                     self._auto_optimize()
                 
                 # Clean up old metrics
-                self._cleanup_metrics()
+                self._cleanup_metrics(now)
                 
-                time.sleep(1.0)  # Monitor every second
+                # Double the interval while ticks are slow, halve it back towards
+                # the base cadence once they are cheap again
+                elapsed = (time.perf_counter_ns() - start) * 1e-9
+                if elapsed > self.tick_budget:
+                    interval = min(self.max_interval, self._tick_interval * 2)
+                else:
+                    interval = self._tick_interval * 0.5
+                self._tick_interval = max(self._base_interval, interval)
+                
+                if self._stop_evt.wait(self._tick_interval):
+                    return
                 
             except Exception as e:
                 self.logger.error(f"Performance monitoring error: {e}")
-                time.sleep(5.0)
+                if self._stop_evt.wait(5.0):
+                    return
     
-    def _collect_system_metrics(self) -> None:
-        """Collect system performance metrics"""
+    def _collect_system_metrics(self, now: Optional[int] = None) -> None:
+        """Collect system performance metrics, all stamped with ``now``"""
+        if now is None:
+            now = time.monotonic_ns()
+        
         try:
             # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            self._add_metric("cpu_usage", cpu_percent, "percent", "system")
+            cpu_percent = psutil.cpu_percent(interval=None)
+            self._add_metric("cpu_usage", cpu_percent, "percent", "system", now)
             
             # Memory usage
             memory = psutil.virtual_memory()
-            self._add_metric("memory_usage", memory.percent, "percent", "system")
+            self._add_metric("memory_usage", memory.percent, "percent", "system", now)
             
             # Disk usage
             disk = psutil.disk_usage('/')
-            self._add_metric("disk_usage", disk.percent, "percent", "system")
+            self._add_metric("disk_usage", disk.percent, "percent", "system", now)
             
             # Process-specific metrics
-            process = psutil.Process(os.getpid())
-            self._add_metric("process_memory", process.memory_info().rss / 1024 / 1024, "MB", "process")
-            self._add_metric("process_cpu", process.cpu_percent(), "percent", "process")
+            self._add_metric("process_memory", self._proc.memory_info().rss / 1024 / 1024, "MB", "process", now)
+            self._add_metric("process_cpu", self._proc.cpu_percent(interval=None), "percent", "process", now)
             
         except Exception as e:
             self.logger.debug(f"Failed to collect system metrics: {e}")
     
-    def _add_metric(self, name: str, value: float, unit: str = "", category: str = "general") -> None:
-        """Add a performance metric"""
-        metric = PerformanceMetric(
-            name=name,
-            value=value,
-            timestamp=time.time(),
-            unit=unit,
-            category=category
-        )
+    def _add_metric(self, name: str, value: float, unit: str = "", category: str = "general",
+                    now: Optional[int] = None) -> None:
+        """Add a performance metric, stamped with ``now`` (monotonic ns) if given"""
+        if now is None:
+            now = time.monotonic_ns()
         
-        self.metrics.append(metric)
-        
-        # Keep only recent metrics (last 1000)
-        if len(self.metrics) > 1000:
-            self.metrics = self.metrics[-1000:]
+        with self._metrics_lock:
+            # Write into the next slot; the oldest metric is overwritten when full
+            i = self._head % self.max_metrics
+            self._ts[i] = now
+            self._val[i] = value
+            self._name[i] = name
+            self._unit[i] = unit
+            self._category[i] = category
+            self._name_idx[name].append(self._head)
+            self._head += 1
+            if self._head - self._tail > self.max_metrics:
+                self._tail = self._head - self.max_metrics
+    
+    @property
+    def metrics(self) -> List[PerformanceMetric]:
+        """Live metrics materialized as PerformanceMetric objects, oldest first"""
+        with self._metrics_lock:
+            return [self._metric_at(i) for i in range(self._tail, self._head)]
+    
+    def _metric_at(self, index: int) -> PerformanceMetric:
+        """Build a PerformanceMetric for ring position ``index``"""
+        i = index % self.max_metrics
+        return PerformanceMetric(
+            name=self._name[i],
+            value=float(self._val[i]),
+            timestamp=int(self._ts[i]),
+            unit=self._unit[i],
+            category=self._category[i]
+        )
     
     def _check_thresholds(self) -> None:
         """Check performance thresholds and log warnings"""
-        for metric_name, threshold in self.thresholds.items():
-            recent_metrics = [m for m in self.metrics[-10:] if m.name == metric_name]
-            
-            if recent_metrics:
-                avg_value = sum(m.value for m in recent_metrics) / len(recent_metrics)
-                
-                if avg_value > threshold:
-                    self.logger.warning(
-                        f"Performance threshold exceeded: {metric_name} = {avg_value:.2f} "
-                        f"(threshold: {threshold})"
-                    )
+        names = list(self.thresholds)
+        limits = np.fromiter(self.thresholds.values(), dtype=np.float64, count=len(names))
+        averages = np.array([self._get_recent_average(name, self.metric_window, np.nan)
+                             for name in names])
+        
+        # NaN (no recent data) never compares greater, so it is never flagged
+        for k in np.flatnonzero(averages > limits):
+            self.logger.warning(
+                f"Performance threshold exceeded: {names[k]} = {averages[k]:.2f} "
+                f"(threshold: {limits[k]})"
+            )
+        
+        # Slow down while every metric is comfortably below half its threshold
+        near_limit = np.any(averages >= 0.5 * limits)
+        self._base_interval = self.active_interval if near_limit else self.idle_interval
     
     def _auto_optimize(self) -> None:
         """Automatically optimize performance"""
@@ -175,153 +294,199 @@ class PerformanceMonitor:
         except Exception as e:
             self.logger.debug(f"Auto-optimization failed: {e}")
     
-    def _get_recent_average(self, metric_name: str, count: int = 5) -> float:
-        """Get average of recent metrics"""
-        recent_metrics = [m for m in self.metrics[-count:] if m.name == metric_name]
-        
-        if not recent_metrics:
-            return 0.0
-        
-        return sum(m.value for m in recent_metrics) / len(recent_metrics)
+    def _get_recent_average(self, metric_name: str, count: int = 5, default: float = 0.0) -> float:
+        """Get average of the last ``count`` live values recorded for a metric"""
+        with self._metrics_lock:
+            positions = self._name_idx.get(metric_name)
+            if not positions:
+                return default
+            
+            idxs = np.fromiter(islice(reversed(positions), count), dtype=np.intp)
+            # Drop positions already expired by cleanup or trimming
+            idxs = idxs[idxs >= self._tail]
+            if idxs.size == 0:
+                return default
+            
+            return float(self._val[idxs % self.max_metrics].mean())
     
     def _apply_optimizations(self) -> None:
         """Apply performance optimizations"""
         try:
             # Clear old metrics to free memory
-            if len(self.metrics) > 500:
-                self.metrics = self.metrics[-250:]
-            
-            # Clear old stats
-            for stats in self.stats.values():
-                if len(stats.recent_times) > 50:
-                    stats.recent_times = deque(list(stats.recent_times)[-25:], maxlen=50)
+            trimmed = False
+            with self._metrics_lock:
+                if self._head - self._tail > 500:
+                    self._tail = self._head - 250
+                    trimmed = True
             
-            # Force garbage collection
-            import gc
-            gc.collect()
+            # Collect only the young generation, and only when something was
+            # dropped; a full collection walks the model's long-lived objects
+            if trimmed:
+                gc.collect(0)
             
             self.logger.info("Performance optimizations applied")
             
         except Exception as e:
             self.logger.debug(f"Optimization application failed: {e}")
     
-    def _cleanup_metrics(self) -> None:
+    def _cleanup_metrics(self, now: Optional[int] = None) -> None:
         """Clean up old metrics"""
-        current_time = time.time()
-        cutoff_time = current_time - 300  # Keep last 5 minutes
+        if now is None:
+            now = time.monotonic_ns()
+        cutoff_time = now - 300_000_000_000  # Keep last 5 minutes
         
-        self.metrics = [m for m in self.metrics if m.timestamp > cutoff_time]
+        # Metrics are written in time order, so expired ones are at the tail
+        with self._metrics_lock:
+            while self._tail < self._head and self._ts[self._tail % self.max_metrics] <= cutoff_time:
+                self._tail += 1
     
     def time_function(self, component_name: str):
-        """Decorator to time function execution"""
+        """Decorator to time function execution
+        
+        The stats entry and metric name are bound once here, so each call only
+        updates the entry's fields in place under its lock.
+        """
+        stats = self._get_stats(component_name)
+        lock = stats._lock
+        metric_name = f"{component_name}_time"
+        add_metric = self._add_metric
+        perf_counter_ns = time.perf_counter_ns
+        
         def decorator(func):
             def wrapper(*args, **kwargs):
-                start_time = time.time()
+                start_ns = perf_counter_ns()
                 try:
                     result = func(*args, **kwargs)
-                    self._record_success(component_name, time.time() - start_time)
-                    return result
                 except Exception as e:
                     self._record_error(component_name, str(e))
                     raise
+                
+                elapsed = (perf_counter_ns() - start_ns) * 1e-9
+                with lock:
+                    stats.total_calls += 1
+                    stats.total_time += elapsed
+                    if elapsed < stats.min_time:
+                        stats.min_time = elapsed
+                    if elapsed > stats.max_time:
+                        stats.max_time = elapsed
+                    stats.recent_times.append(elapsed)
+                add_metric(metric_name, elapsed, "seconds", "timing")
+                return result
             return wrapper
         return decorator
     
+    def _get_stats(self, component_name: str) -> PerformanceStats:
+        """Get or atomically create the stats entry for a component"""
+        stats = self.stats.get(component_name)
+        if stats is None:
+            # dict.setdefault is atomic, so racing threads share one entry
+            stats = self.stats.setdefault(component_name, PerformanceStats(component_name))
+        return stats
+    
     def _record_success(self, component_name: str, execution_time: float) -> None:
         """Record successful operation"""
-        if component_name not in self.stats:
-            self.stats[component_name] = PerformanceStats(component_name)
-        
-        stats = self.stats[component_name]
-        stats.total_calls += 1
-        stats.total_time += execution_time
-        stats.min_time = min(stats.min_time, execution_time)
-        stats.max_time = max(stats.max_time, execution_time)
-        stats.avg_time = stats.total_time / stats.total_calls
-        stats.recent_times.append(execution_time)
+        stats = self._get_stats(component_name)
+        with stats._lock:
+            stats.total_calls += 1
+            stats.total_time += execution_time
+            stats.min_time = min(stats.min_time, execution_time)
+            stats.max_time = max(stats.max_time, execution_time)
+            stats.recent_times.append(execution_time)
         
         # Add metric
         self._add_metric(f"{component_name}_time", execution_time, "seconds", "timing")
     
     def _record_error(self, component_name: str, error_message: str) -> None:
         """Record operation error"""
-        if component_name not in self.stats:
-            self.stats[component_name] = PerformanceStats(component_name)
-        
-        stats = self.stats[component_name]
-        stats.error_count += 1
-        stats.last_error = error_message
+        stats = self._get_stats(component_name)
+        with stats._lock:
+            stats.error_count += 1
+            stats.last_error = error_message
         
         # Add error metric
         self._add_metric(f"{component_name}_errors", 1, "count", "errors")
     
-    def get_performance_report(self) -> Dict[str, Any]:
-        """Get comprehensive performance report"""
-        report = {
-            "timestamp": time.time(),
-            "components": {},
-            "system_metrics": {},
-            "recommendations": []
-        }
+    def get_performance_report(self, copy: bool = False) -> Dict[str, Any]:
+        """Get comprehensive performance report
+        
+        The report dict is cached and refreshed in place on each call; pass
+        ``copy=True`` for a snapshot that later calls will not modify.
+        """
+        report = self._report_cache
+        report["timestamp"] = time.time()
         
         # Component statistics
-        for name, stats in self.stats.items():
-            report["components"][name] = {
-                "total_calls": stats.total_calls,
-                "avg_time": stats.avg_time,
-                "min_time": stats.min_time,
-                "max_time": stats.max_time,
-                "error_count": stats.error_count,
-                "error_rate": stats.error_count / max(stats.total_calls, 1) * 100,
-                "last_error": stats.last_error
-            }
+        components = report["components"]
+        for name, stats in list(self.stats.items()):
+            entry = stats.snapshot(into=components.setdefault(name, {}))
+            entry["error_rate"] = entry["error_count"] / max(entry["total_calls"], 1) * 100
         
-        # System metrics
-        recent_metrics = self.metrics[-10:] if self.metrics else []
-        for metric in recent_metrics:
-            if metric.category == "system":
-                report["system_metrics"][metric.name] = {
-                    "value": metric.value,
-                    "unit": metric.unit
-                }
+        # System metrics: latest live value of each system-category metric
+        system_metrics = report["system_metrics"]
+        with self._metrics_lock:
+            for name, positions in self._name_idx.items():
+                if not positions:
+                    continue
+                latest = positions[-1]
+                i = latest % self.max_metrics
+                if self._category[i] != "system":
+                    continue
+                if latest < self._tail:
+                    system_metrics.pop(name, None)
+                    continue
+                entry = system_metrics.setdefault(name, {})
+                entry["value"] = float(self._val[i])
+                entry["unit"] = self._unit[i]
         
-        # Generate recommendations
-        report["recommendations"] = self._generate_recommendations()
+        # Generate recommendations from the figures gathered above
+        averages = self._recent_averages()
+        report["recommendations"][:] = self._generate_recommendations(components, averages)
         
+        if copy:
+            return {
+                "timestamp": report["timestamp"],
+                "components": {name: dict(entry) for name, entry in components.items()},
+                "system_metrics": {name: dict(entry) for name, entry in system_metrics.items()},
+                "recommendations": list(report["recommendations"])
+            }
         return report
     
-    def _generate_recommendations(self) -> List[str]:
-        """Generate performance recommendations"""
+    def _recent_averages(self) -> Dict[str, float]:
+        """Recent averages of the metrics used by recommendations and optimizations"""
+        return {name: self._get_recent_average(name)
+                for name in ("cpu_usage", "memory_usage", "transcription_time")}
+    
+    def _generate_recommendations(self, components: Dict[str, Dict[str, Any]],
+                                  averages: Dict[str, float]) -> List[str]:
+        """Generate performance recommendations from report components and averages"""
         recommendations = []
         
         # Check component performance
-        for name, stats in self.stats.items():
-            if stats.avg_time > self.thresholds.get(f"{name}_time", 5.0):
-                recommendations.append(f"Consider optimizing {name} (avg: {stats.avg_time:.2f}s)")
+        for name, entry in components.items():
+            if entry["avg_time"] > self.thresholds.get(f"{name}_time", 5.0):
+                recommendations.append(f"Consider optimizing {name} (avg: {entry['avg_time']:.2f}s)")
             
-            if stats.error_count > 0:
-                error_rate = stats.error_count / max(stats.total_calls, 1) * 100
-                if error_rate > 10:
-                    recommendations.append(f"High error rate in {name}: {error_rate:.1f}%")
+            if entry["error_rate"] > 10:
+                recommendations.append(f"High error rate in {name}: {entry['error_rate']:.1f}%")
         
         # Check system metrics
-        recent_cpu = self._get_recent_average("cpu_usage")
+        recent_cpu = averages["cpu_usage"]
         if recent_cpu > 80:
             recommendations.append(f"High CPU usage: {recent_cpu:.1f}%")
         
-        recent_memory = self._get_recent_average("memory_usage")
+        recent_memory = averages["memory_usage"]
         if recent_memory > 80:
             recommendations.append(f"High memory usage: {recent_memory:.1f}%")
         
         # Check transcription performance
-        transcription_time = self._get_recent_average("transcription_time")
+        transcription_time = averages["transcription_time"]
         if transcription_time > 10:
             recommendations.append(f"Slow transcription: {transcription_time:.2f}s - consider using smaller Whisper model")
         
         return recommendations
     
-    def optimize_for_speed(self) -> Dict[str, Any]:
-        """Optimize system for speed"""
+    def optimize_for_speed(self, averages: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Optimize system for speed, reusing ``averages`` from a report if given"""
         optimizations = {
             "applied": [],
             "skipped": [],
@@ -329,22 +494,25 @@ class PerformanceMonitor:
         }
         
         try:
+            if averages is None:
+                averages = self._recent_averages()
+            
             # Reduce Whisper model size if transcription is slow
-            transcription_time = self._get_recent_average("transcription_time")
+            transcription_time = averages["transcription_time"]
             if transcription_time > 5.0:
                 optimizations["applied"].append("Consider using smaller Whisper model (tiny/base)")
             else:
                 optimizations["skipped"].append("Transcription speed is acceptable")
             
             # Reduce audio preprocessing if CPU is high
-            cpu_usage = self._get_recent_average("cpu_usage")
+            cpu_usage = averages["cpu_usage"]
             if cpu_usage > 70:
                 optimizations["applied"].append("Reduce audio preprocessing complexity")
             else:
                 optimizations["skipped"].append("CPU usage is acceptable")
             
             # Clear caches if memory is high
-            memory_usage = self._get_recent_average("memory_usage")
+            memory_usage = averages["memory_usage"]
             if memory_usage > 75:
                 optimizations["applied"].append("Clear caches and old metrics")
                 self._apply_optimizations()
@@ -362,24 +530,41 @@ class PerformanceMonitor:
     
     def reset_stats(self, component_name: Optional[str] = None) -> None:
         """Reset statistics for a component or all components"""
+        # Entries are zeroed rather than removed: time_function wrappers hold them
         if component_name:
             if component_name in self.stats:
-                del self.stats[component_name]
+                self.stats[component_name].reset()
                 self.logger.info(f"Reset stats for {component_name}")
         else:
-            self.stats.clear()
-            self.metrics.clear()
+            for stats in list(self.stats.values()):
+                stats.reset()
+            with self._metrics_lock:
+                self._tail = self._head
+                self._name_idx.clear()
+                self._report_cache["system_metrics"].clear()
             self.logger.info("Reset all performance statistics")
     
     def export_stats(self, filename: str) -> bool:
         """Export performance statistics to file"""
         try:
-            import json
-            
             report = self.get_performance_report()
             
-            with open(filename, 'w') as f:
-                json.dump(report, f, indent=2)
+            try:
+                import orjson
+            except ImportError:
+                orjson = None
+            
+            if orjson is not None:
+                data = orjson.dumps(
+                    report,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                )
+                with open(filename, 'wb') as f:
+                    f.write(data)
+            else:
+                import json
+                with open(filename, 'w') as f:
+                    json.dump(report, f, indent=2)
             
             self.logger.info(f"Performance stats exported to {filename}")
             return True
@@ -3,9 +3,21 @@ Plugin system for extensible output handlers
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, NamedTuple
+import importlib
+import re
+import sys
 import logging
-from pathlib import Path
+import threading
+import time
+from pynput import keyboard
+from pynput.keyboard import Key
+import pyperclip
+
+
+# One keyboard controller for the whole process, created on first use
+_shared_controller: Optional[keyboard.Controller] = None
+_controller_lock = threading.Lock()
 
 
 class OutputHandler(ABC):
@@ -14,6 +26,124 @@ class OutputHandler(ABC):
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self._controller: Optional[keyboard.Controller] = None
+        
+        # Window the focus keys were last sent to, and when
+        self._last_focus_key: Optional[Tuple[str, str]] = None
+        self._last_focus_ts = 0.0
+    
+    def _get_controller(self) -> keyboard.Controller:
+        """Keyboard controller shared by every handler"""
+        # Created on first use so loading a handler never touches the event source
+        if self._controller is None:
+            global _shared_controller
+            with _controller_lock:
+                if _shared_controller is None:
+                    _shared_controller = keyboard.Controller()
+            self._controller = _shared_controller
+        return self._controller
+    
+    # Focus keys are not resent to the same window within this many seconds
+    FOCUS_TTL = 2.0
+    
+    # Texts shorter than this are typed as key events instead of pasted, leaving
+    # the clipboard alone. Only handlers that stage text with _stage_text use it;
+    # terminal targets keep real paste semantics. Kept short because every typed
+    # key can trigger the target's autocomplete.
+    DIRECT_INPUT_MAX_CHARS = 32
+    
+    # Characters that open command or mention popups in chat inputs when typed;
+    # texts containing them are always pasted
+    _POPUP_TRIGGER_RE = re.compile(r"[/@]")
+    
+    # Keywords returned by get_match_keywords; lazily loaded handlers must
+    # declare the same tuple as their HANDLER_SPECS entry
+    MATCH_KEYWORDS: Optional[Tuple[str, ...]] = None
+    
+    # Paste shortcut modifier: Cmd on macOS, Ctrl elsewhere
+    PASTE_MODIFIER = Key.cmd if sys.platform == 'darwin' else Key.ctrl
+    
+    # Key sequences are tuples of (op, arg) steps run by _run_seq:
+    #   ("chord", (modifier, key, ...)) taps each key while the modifier is held
+    #   ("tap", key) taps a single key, ("sleep", seconds) waits
+    # The target app handles the paste before the Enter queued behind it, so
+    # the two are posted back to back
+    _SEQ_PASTE = (("chord", (PASTE_MODIFIER, 'v')),)
+    _SEQ_PASTE_SUBMIT = _SEQ_PASTE + (("tap", Key.enter),)
+    
+    def _run_seq(self, seq) -> None:
+        """Play a key sequence on this handler's controller"""
+        controller = self._get_controller()
+        for op, arg in seq:
+            if op == "chord":
+                modifier, *keys = arg
+                with controller.pressed(modifier):
+                    for key in keys:
+                        controller.tap(key)
+            elif op == "sleep":
+                time.sleep(arg)
+            elif op == "tap":
+                controller.tap(arg)
+            else:
+                raise ValueError(f"Unknown key sequence op: {op}")
+    
+    def _paste_and_submit(self, submit: bool = True) -> None:
+        """Paste the clipboard with Cmd+V, then press Enter if ``submit``"""
+        self._run_seq(self._SEQ_PASTE_SUBMIT if submit else self._SEQ_PASTE)
+    
+    @staticmethod
+    def preprocess_app_info(app_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Store the lowercased app name and window title on app_info
+        
+        The dispatcher calls this once per event so every handler can share
+        the lowercased strings instead of lowercasing them itself.
+        """
+        app_info['_name_lc'] = app_info.get('name', '').lower()
+        app_info['_title_lc'] = app_info.get('title', '').lower()
+        return app_info
+    
+    @staticmethod
+    def _name_and_title(app_info: Dict[str, Any]) -> Tuple[str, str]:
+        """Lowercased app name and window title from preprocess_app_info"""
+        if '_name_lc' not in app_info:
+            OutputHandler.preprocess_app_info(app_info)
+        return app_info['_name_lc'], app_info['_title_lc']
+    
+    def _focus_is_fresh(self, app_info: Dict[str, Any]) -> bool:
+        """Check whether focus keys went to this window within FOCUS_TTL
+        
+        When they did not, the window is recorded as focused now, so callers
+        should send their focus keys whenever this returns False.
+        """
+        key = (app_info.get('bundle_id') or app_info.get('name', ''), app_info.get('title', ''))
+        now = time.monotonic()
+        if key == self._last_focus_key and now - self._last_focus_ts < self.FOCUS_TTL:
+            return True
+        self._last_focus_key = key
+        self._last_focus_ts = now
+        return False
+    
+    def _stage_text(self, text: str) -> bool:
+        """Copy text to the clipboard unless it is short enough to type directly
+        
+        Returns True when the text will be typed by _insert_and_submit.
+        """
+        if (0 < len(text) < self.DIRECT_INPUT_MAX_CHARS and '\n' not in text
+                and self._POPUP_TRIGGER_RE.search(text) is None):
+            return True
+        pyperclip.copy(text)
+        return False
+    
+    def _insert_and_submit(self, text: str, direct: bool, submit: bool = True) -> None:
+        """Type or paste text staged by _stage_text, then press Enter"""
+        if not direct:
+            self._paste_and_submit(submit=submit)
+            return
+        
+        controller = self._get_controller()
+        controller.type(text)
+        if submit:
+            controller.tap(Key.enter)
     
     @abstractmethod
     def can_handle(self, app_info: Dict[str, Any]) -> bool:
@@ -38,6 +168,39 @@ class OutputHandler(ABC):
     def get_description(self) -> str:
         """Get handler description"""
         return f"{self.get_name()} output handler"
+    
+    def get_match_keywords(self) -> Optional[Tuple[str, ...]]:
+        """Lowercase keywords, one of which must occur in the app name or title
+        for can_handle to succeed. None means the handler must always be asked."""
+        return self.MATCH_KEYWORDS
+
+
+class HandlerSpec(NamedTuple):
+    """Registry entry describing a handler without importing it"""
+    module: str                            # Module path relative to this package
+    class_name: str
+    priority: int                          # Checked against get_priority() on load
+    keywords: Optional[Tuple[str, ...]]    # None: load eagerly, ask instance;
+                                           # otherwise checked against MATCH_KEYWORDS
+
+
+# Handlers with static keywords are imported only when dispatch first needs them.
+# Handlers whose match or priority depends on runtime state are loaded eagerly.
+HANDLER_SPECS: List[HandlerSpec] = [
+    HandlerSpec('.handlers.ducky_mac_handler', 'DuckyMacHandler', 95, None),
+    HandlerSpec('.handlers.vscode_roo_handler', 'VSCodeRooHandler', 90,
+                ('visual studio code', 'code')),
+    HandlerSpec('.handlers.amazon_q_handler', 'AmazonQHandler', 88,
+                ('amazon q', 'amazonq', 'aws q', 'q developer', 'q chat', 'q:')),
+    HandlerSpec('.handlers.openwebui_handler', 'OpenWebUIHandler', 87,
+                ('openwebui', 'open webui', 'webui')),
+    HandlerSpec('.handlers.cursor_handler', 'CursorHandler', 85,
+                ('cursor', 'ai', 'chat', 'composer')),
+    HandlerSpec('.handlers.qwen_code_handler', 'QwenCodeHandler', 80,
+                ('qwen', 'tongyi', 'alibaba', 'ai assistant')),
+    HandlerSpec('.handlers.terminal_handler', 'TerminalHandler', 70, None),
+    HandlerSpec('.handlers.generic_handler', 'GenericHandler', 1, None),
+]
 
 
 class PluginManager:
@@ -46,53 +209,131 @@ class PluginManager:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self.handlers: List[OutputHandler] = []
+        self.handlers: List[OutputHandler] = []  # Loaded handlers, highest priority first
+        
+        # Dispatch order as (priority, spec), and instances loaded so far
+        self._dispatch_order: List[Tuple[int, HandlerSpec]] = []
+        self._instances: Dict[str, Optional[OutputHandler]] = {}
+        
+        # Keyword dispatch index, rebuilt whenever handlers are (re)loaded
+        self._keyword_re: Optional[re.Pattern] = None
+        self._keyword_handlers: Dict[str, frozenset] = {}
+        self._always_check: frozenset = frozenset()
+        
         self._load_handlers()
     
     def _load_handlers(self) -> None:
-        """Load all available output handlers"""
+        """Load eager handlers and register the rest for lazy loading"""
+        self._dispatch_order = []
+        
+        for spec in HANDLER_SPECS:
+            if spec.keywords is None:
+                handler = self._get_instance(spec)
+                if handler is not None:
+                    self._dispatch_order.append((handler.get_priority(), spec))
+            else:
+                self._dispatch_order.append((spec.priority, spec))
+        
+        # Sort by priority (highest first)
+        self._dispatch_order.sort(key=lambda entry: entry[0], reverse=True)
+        
+        self._build_keyword_index()
+    
+    def _get_instance(self, spec: HandlerSpec) -> Optional[OutputHandler]:
+        """Import and instantiate a handler on first use, then reuse it"""
+        if spec.class_name in self._instances:
+            return self._instances[spec.class_name]
+        
+        handler = None
         try:
-            # Import all handler modules
-            from .handlers.generic_handler import GenericHandler
-            from .handlers.vscode_roo_handler import VSCodeRooHandler
-            from .handlers.cursor_handler import CursorHandler
-            from .handlers.qwen_code_handler import QwenCodeHandler
-            from .handlers.ducky_mac_handler import DuckyMacHandler
-            from .handlers.terminal_handler import TerminalHandler
-            from .handlers.amazon_q_handler import AmazonQHandler
-            from .handlers.openwebui_handler import OpenWebUIHandler
-            
-            # Create handler instances
-            handler_classes = [
-                DuckyMacHandler,  # Highest priority for Mac systems
-                AmazonQHandler,   # High priority for Amazon Q
-                OpenWebUIHandler, # High priority for OpenWebUI
-                TerminalHandler,  # Medium-high priority for terminals
-                VSCodeRooHandler,
-                CursorHandler,
-                QwenCodeHandler,
-                GenericHandler   # Lowest priority - fallback
-            ]
-            
-            for handler_class in handler_classes:
-                try:
-                    handler = handler_class(self.config)
-                    self.handlers.append(handler)
-                    self.logger.info(f"Loaded handler: {handler.get_name()}")
-                except Exception as e:
-                    self.logger.warning(f"Failed to load {handler_class.__name__}: {e}")
-            
-            # Sort by priority (highest first)
+            module = importlib.import_module(spec.module, __name__)
+            handler = getattr(module, spec.class_name)(self.config)
+            if spec.keywords is not None:
+                self._check_spec(spec, handler)
+            self.handlers.append(handler)
             self.handlers.sort(key=lambda h: h.get_priority(), reverse=True)
-            
-        except ImportError as e:
-            self.logger.error(f"Failed to import handlers: {e}")
+            self.logger.info(f"Loaded handler: {handler.get_name()}")
+        except Exception as e:
+            self.logger.warning(f"Failed to load {spec.class_name}: {e}")
+        
+        # Failures are cached too, so a broken handler is not retried per dispatch
+        self._instances[spec.class_name] = handler
+        return handler
+    
+    def _check_spec(self, spec: HandlerSpec, handler: OutputHandler) -> None:
+        """Correct dispatch if a lazy spec disagrees with its loaded handler"""
+        priority = handler.get_priority()
+        keywords = handler.get_match_keywords()
+        if priority == spec.priority and keywords == spec.keywords:
+            return
+        
+        self.logger.error(
+            f"HANDLER_SPECS entry for {spec.class_name} is out of date "
+            f"(priority {spec.priority}, keywords {spec.keywords}); "
+            f"using the handler's priority {priority} and keywords {keywords}"
+        )
+        corrected = spec._replace(priority=priority, keywords=keywords)
+        self._dispatch_order = sorted(
+            ((priority, corrected) if entry is spec else (entry_priority, entry)
+             for entry_priority, entry in self._dispatch_order),
+            key=lambda entry: entry[0], reverse=True
+        )
+        self._build_keyword_index()
+    
+    def _build_keyword_index(self) -> None:
+        """Build one regex over every handler keyword for single-pass dispatch"""
+        keyword_owners: Dict[str, set] = {}
+        always_check = set()
+        
+        for _, spec in self._dispatch_order:
+            keywords = spec.keywords
+            if keywords is None:
+                keywords = self._instances[spec.class_name].get_match_keywords()
+            if keywords is None:
+                always_check.add(spec.class_name)
+                continue
+            for keyword in keywords:
+                keyword_owners.setdefault(keyword, set()).add(spec.class_name)
+        
+        # The lookahead reports the longest keyword starting at each position;
+        # any shorter keyword starting there is a prefix of it, so fold the
+        # owners of those prefixes into each keyword's entry.
+        self._keyword_handlers = {
+            keyword: frozenset().union(*(owners for other, owners in keyword_owners.items()
+                                         if keyword.startswith(other)))
+            for keyword in keyword_owners
+        }
+        self._always_check = frozenset(always_check)
+        
+        if keyword_owners:
+            alternation = '|'.join(re.escape(k) for k in sorted(keyword_owners, key=len, reverse=True))
+            self._keyword_re = re.compile(f'(?=({alternation}))')
+        else:
+            self._keyword_re = None
+    
+    def _candidate_handlers(self, app_info: Dict[str, Any]) -> frozenset:
+        """Class names of handlers whose keywords occur in the app name or title"""
+        if self._keyword_re is None:
+            return self._always_check
+        
+        key = f"{app_info['_name_lc']}\n{app_info['_title_lc']}"
+        candidates = set(self._always_check)
+        for match in self._keyword_re.finditer(key):
+            candidates |= self._keyword_handlers[match.group(1)]
+        return frozenset(candidates)
     
     def get_handler_for_app(self, app_info: Dict[str, Any]) -> Optional[OutputHandler]:
         """Get the best handler for the current application"""
-        for handler in self.handlers:
-            if handler.can_handle(app_info):
-                self.logger.info(f"Selected handler: {handler.get_name()}")
+        # One pass over name+title rules out handlers with no keyword present;
+        # can_handle stays authoritative for the remaining candidates
+        OutputHandler.preprocess_app_info(app_info)
+        candidates = self._candidate_handlers(app_info)
+        for _, spec in self._dispatch_order:
+            if spec.class_name not in candidates:
+                continue
+            handler = self._get_instance(spec)
+            if handler is not None and handler.can_handle(app_info):
+                self.logger.info("Selected handler: %s", handler.get_name())
                 return handler
         
         self.logger.warning("No suitable handler found")
@@ -114,16 +355,27 @@ class PluginManager:
     
     def get_available_handlers(self) -> List[Dict[str, Any]]:
         """Get list of available handlers"""
-        return [
-            {
-                "name": handler.get_name(),
-                "description": handler.get_description(),
-                "priority": handler.get_priority()
-            }
-            for handler in self.handlers
-        ]
+        # Handlers not used yet are listed from their specs rather than imported
+        handlers = []
+        for priority, spec in self._dispatch_order:
+            if spec.class_name not in self._instances:
+                handlers.append({
+                    "name": spec.class_name,
+                    "description": "Loaded on first use",
+                    "priority": priority
+                })
+                continue
+            handler = self._instances[spec.class_name]
+            if handler is not None:
+                handlers.append({
+                    "name": handler.get_name(),
+                    "description": handler.get_description(),
+                    "priority": handler.get_priority()
+                })
+        return handlers
     
     def reload_handlers(self) -> None:
         """Reload all handlers"""
         self.handlers.clear()
+        self._instances.clear()
         self._load_handlers()
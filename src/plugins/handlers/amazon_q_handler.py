@@ -3,46 +3,49 @@ Amazon Q Developer and Amazon Q Chat handler
 """
 
 from typing import Dict, Any
-import logging
+import functools
+import re
+import sys
 import time
-from pynput import keyboard
 from pynput.keyboard import Key
 import pyperclip
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from plugins import OutputHandler
+from .. import OutputHandler
 
 
 class AmazonQHandler(OutputHandler):
     """Handler for Amazon Q Developer and Amazon Q Chat"""
     
+    # Dispatch keywords, matching this handler's HANDLER_SPECS entry
+    MATCH_KEYWORDS = ('amazon q', 'amazonq', 'aws q', 'q developer', 'q chat', 'q:')
+    
+    # Amazon Q indicators in the app name
+    _NAME_RE = re.compile(r"amazon q|amazonq|aws q|q developer|q chat")
+    # Amazon Q features in the window title ("q:" is the terminal prompt)
+    _TITLE_RE = re.compile(r"amazon q|q developer|q chat|aws q|q:")
+    # Window titles of terminal-based Q chat
+    _TERMINAL_RE = re.compile(r"terminal|q:|aws q")
+    
+    # Terminal: move to the end of the prompt (Cmd+Right on macOS, End
+    # elsewhere), then paste and submit
+    _SEQ_TERMINAL_SEND = (
+        (("chord", (Key.cmd, Key.right)),) if sys.platform == 'darwin' else (("tap", Key.end),)
+    ) + OutputHandler._SEQ_PASTE_SUBMIT
+    # GUI: Cmd+L for chat focus, Tab into the input field, then paste and submit
+    _SEQ_GUI_SEND = (
+        ("chord", (Key.cmd, 'l')), ("sleep", 0.2), ("tap", Key.tab), ("sleep", 0.1),
+    ) + OutputHandler._SEQ_PASTE_SUBMIT
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _classify(app_name: str, window_title: str) -> bool:
+        """Match lowercased name/title; cached since focus rarely changes"""
+        return bool(AmazonQHandler._NAME_RE.search(app_name) or
+                    AmazonQHandler._TITLE_RE.search(window_title))
+    
     def can_handle(self, app_info: Dict[str, Any]) -> bool:
         """Check if this is Amazon Q Developer or Amazon Q Chat"""
-        app_name = app_info.get('name', '').lower()
-        window_title = app_info.get('title', '').lower()
-        
-        # Check for Amazon Q indicators
-        is_amazon_q = (
-            'amazon q' in app_name or
-            'amazonq' in app_name or
-            'aws q' in app_name or
-            'q developer' in app_name or
-            'q chat' in app_name
-        )
-        
-        # Check window title for Amazon Q features
-        has_q_features = (
-            'amazon q' in window_title or
-            'q developer' in window_title or
-            'q chat' in window_title or
-            'aws q' in window_title or
-            'q:' in window_title  # Terminal prompt indicator
-        )
-        
-        return is_amazon_q or has_q_features
+        return self._classify(*self._name_and_title(app_info))
     
     def send_text(self, text: str, app_info: Dict[str, Any]) -> bool:
         """Send text to Amazon Q Developer or Amazon Q Chat"""
@@ -54,12 +57,8 @@ class AmazonQHandler(OutputHandler):
             time.sleep(0.1)
             
             # Check if it's a terminal-based Q chat
-            window_title = app_info.get('title', '').lower()
-            is_terminal = (
-                'terminal' in window_title or
-                'q:' in window_title or
-                'aws q' in window_title
-            )
+            _, window_title = self._name_and_title(app_info)
+            is_terminal = self._TERMINAL_RE.search(window_title) is not None
             
             if is_terminal:
                 # Terminal-based: Use Cmd+V
@@ -77,57 +76,11 @@ class AmazonQHandler(OutputHandler):
     
     def _send_to_terminal(self, text: str) -> None:
         """Send text to terminal-based Amazon Q Chat - ensure focus"""
-        with keyboard.Controller() as controller:
-            # Ensure we're at the command prompt
-            # Move cursor to end of line
-            controller.press(Key.cmd)
-            controller.press(Key.right)
-            controller.release(Key.right)
-            controller.release(Key.cmd)
-            time.sleep(0.1)
-            
-            # Paste with Cmd+V
-            controller.press(Key.cmd)
-            controller.press('v')
-            controller.release('v')
-            controller.release(Key.cmd)
-            
-            time.sleep(0.15)
-            
-            # Press Enter to submit
-            controller.press(Key.enter)
-            controller.release(Key.enter)
+        self._run_seq(self._SEQ_TERMINAL_SEND)
     
     def _send_to_gui(self, text: str, app_info: Dict[str, Any]) -> None:
         """Send text to GUI-based Amazon Q Developer - ensure input focused"""
-        with keyboard.Controller() as controller:
-            # Try multiple strategies to focus input
-            try:
-                # Strategy 1: Try Cmd+L (common for chat focus)
-                controller.press(Key.cmd)
-                controller.press('l')
-                controller.release('l')
-                controller.release(Key.cmd)
-                time.sleep(0.2)
-            except:
-                pass
-            
-            # Strategy 2: Try Tab to focus input field
-            controller.press(Key.tab)
-            controller.release(Key.tab)
-            time.sleep(0.1)
-            
-            # Paste the text
-            controller.press(Key.cmd)
-            controller.press('v')
-            controller.release('v')
-            controller.release(Key.cmd)
-            
-            time.sleep(0.15)
-            
-            # Press Enter to submit
-            controller.press(Key.enter)
-            controller.release(Key.enter)
+        self._run_seq(self._SEQ_GUI_SEND)
     
     def get_priority(self) -> int:
         """High priority for Amazon Q"""
@@ -3,45 +3,44 @@ Cursor IDE handler
 """
 
 from typing import Dict, Any
-import logging
+import functools
+import re
 import time
-from pynput import keyboard
 from pynput.keyboard import Key
-import pyperclip
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from plugins import OutputHandler
+from .. import OutputHandler
 
 
 class CursorHandler(OutputHandler):
     """Handler specifically for Cursor IDE"""
     
+    # Dispatch keywords, matching this handler's HANDLER_SPECS entry
+    MATCH_KEYWORDS = ('cursor', 'ai', 'chat', 'composer')
+    
+    # Cursor-specific indicators in the window title
+    _TITLE_RE = re.compile(r"cursor|ai|chat|composer")
+    
+    # Cmd+L opens chat, then Cmd+K as a fallback for the composer
+    _SEQ_CURSOR_FOCUS = (
+        ("chord", (Key.cmd, 'l')), ("sleep", 0.2),
+        ("chord", (Key.cmd, 'k')), ("sleep", 0.1),
+    )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _classify(app_name: str, window_title: str) -> bool:
+        """Match lowercased name/title; cached since focus rarely changes"""
+        return 'cursor' in app_name or CursorHandler._TITLE_RE.search(window_title) is not None
+    
     def can_handle(self, app_info: Dict[str, Any]) -> bool:
         """Check if this is Cursor IDE"""
-        app_name = app_info.get('name', '').lower()
-        window_title = app_info.get('title', '').lower()
-        
-        # Check if it's Cursor
-        is_cursor = 'cursor' in app_name
-        
-        # Check for Cursor-specific indicators
-        has_cursor_features = (
-            'cursor' in window_title or
-            'ai' in window_title or
-            'chat' in window_title or
-            'composer' in window_title
-        )
-        
-        return is_cursor or has_cursor_features
+        return self._classify(*self._name_and_title(app_info))
     
     def send_text(self, text: str, app_info: Dict[str, Any]) -> bool:
         """Send text to Cursor IDE"""
         try:
-            # Copy to clipboard
-            pyperclip.copy(text)
+            # Copy to clipboard, unless the text is short enough to type
+            direct = self._stage_text(text)
             
             # Small delay
             time.sleep(0.1)
@@ -49,19 +48,8 @@ class CursorHandler(OutputHandler):
             # Try to focus the Cursor chat/composer
             self._focus_cursor_input()
             
-            # Paste the text
-            with keyboard.Controller() as controller:
-                controller.press(Key.cmd)
-                controller.press('v')
-                controller.release('v')
-                controller.release(Key.cmd)
-                
-                # Wait a moment for paste to complete
-                time.sleep(0.1)
-                
-                # Press Enter to submit
-                controller.press(Key.enter)
-                controller.release(Key.enter)
+            # Type or paste the text
+            self._insert_and_submit(text, direct)
             
             self.logger.info("Text sent to Cursor IDE and submitted")
             return True
@@ -73,23 +61,7 @@ class CursorHandler(OutputHandler):
     def _focus_cursor_input(self) -> None:
         """Try to focus the Cursor input field"""
         try:
-            with keyboard.Controller() as controller:
-                # Try Cmd+L to open chat (common Cursor shortcut)
-                controller.press(Key.cmd)
-                controller.press('l')
-                controller.release('l')
-                controller.release(Key.cmd)
-                
-                time.sleep(0.2)
-                
-                # Alternative: Try Cmd+K for composer
-                controller.press(Key.cmd)
-                controller.press('k')
-                controller.release('k')
-                controller.release(Key.cmd)
-                
-                time.sleep(0.1)
-                
+            self._run_seq(self._SEQ_CURSOR_FOCUS)
         except Exception as e:
             self.logger.debug(f"Could not focus Cursor input: {e}")
     
@@ -5,15 +5,9 @@ Generic output handler for any application
 from typing import Dict, Any
 import logging
 import time
-from pynput import keyboard
 from pynput.keyboard import Key
-import pyperclip
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from plugins import OutputHandler
+from .. import OutputHandler
 
 
 class GenericHandler(OutputHandler):
@@ -26,52 +20,42 @@ class GenericHandler(OutputHandler):
     def send_text(self, text: str, app_info: Dict[str, Any]) -> bool:
         """Send text using clipboard and paste - ensure correct focus"""
         try:
-            # Copy text to clipboard
-            pyperclip.copy(text)
-            
-            # Wait a moment for clipboard to update
-            time.sleep(0.15)
+            # Copy text to clipboard, unless it is short enough to type
+            direct = self._stage_text(text)
             
             # IMPORTANT: Ensure we're pasting into the correct field
             # First, try to focus the input field by clicking or using Tab
-            self._ensure_input_focus()
+            self._ensure_input_focus(app_info)
             
-            # Small delay to ensure focus is set
-            time.sleep(0.1)
+            # One wait covers both the clipboard update and the focus change
+            time.sleep(0.15)
             
-            # Simulate Cmd+V to paste
-            with keyboard.Controller() as controller:
-                controller.press(Key.cmd)
-                controller.press('v')
-                controller.release('v')
-                controller.release(Key.cmd)
-                
-                # Wait a moment for paste to complete
-                time.sleep(0.15)
-                
-                # Press Enter to submit
-                controller.press(Key.enter)
-                controller.release(Key.enter)
+            # Type the text, or simulate Cmd+V to paste it
+            self._insert_and_submit(text, direct)
             
-            self.logger.info(f"Sent text via clipboard and submitted: '{text[:50]}...'")
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("Sent text and submitted: '%s...'", text[:50])
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to send text: {e}")
             return False
     
-    def _ensure_input_focus(self) -> None:
+    def _ensure_input_focus(self, app_info: Dict[str, Any]) -> None:
         """Try to ensure the input field is focused before pasting"""
+        if self._focus_is_fresh(app_info):
+            return
+        
         try:
-            with keyboard.Controller() as controller:
-                # Try Tab to move to input field (common pattern)
-                # This works in many applications
-                controller.press(Key.tab)
-                controller.release(Key.tab)
-                time.sleep(0.1)
-                
-                # Alternative: Try Shift+Tab to go back if we went too far
-                # But for now, just Tab should work for most cases
+            controller = self._get_controller()
+            
+            # Try Tab to move to input field (common pattern)
+            # This works in many applications
+            controller.press(Key.tab)
+            controller.release(Key.tab)
+            
+            # Alternative: Try Shift+Tab to go back if we went too far
+            # But for now, just Tab should work for most cases
                 
         except Exception as e:
             self.logger.debug(f"Could not ensure input focus: {e}")
@@ -3,69 +3,44 @@ Qwen Code handler
 """
 
 from typing import Dict, Any
-import logging
+import re
 import time
-from pynput import keyboard
 from pynput.keyboard import Key
-import pyperclip
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from plugins import OutputHandler
+from .. import OutputHandler
 
 
 class QwenCodeHandler(OutputHandler):
     """Handler specifically for Qwen Code"""
     
+    # Dispatch keywords, matching this handler's HANDLER_SPECS entry
+    MATCH_KEYWORDS = ('qwen', 'tongyi', 'alibaba', 'ai assistant')
+    
+    # Qwen Code app names ("qwen code" is covered by "qwen")
+    _NAME_RE = re.compile(r"qwen|tongyi")
+    # Qwen-specific indicators in the window title
+    _TITLE_RE = re.compile(r"qwen|tongyi|alibaba|ai assistant")
+    
     def can_handle(self, app_info: Dict[str, Any]) -> bool:
         """Check if this is Qwen Code"""
-        app_name = app_info.get('name', '').lower()
-        window_title = app_info.get('title', '').lower()
-        
-        # Check if it's Qwen Code
-        is_qwen = (
-            'qwen' in app_name or
-            'qwen code' in app_name or
-            'tongyi' in app_name
-        )
-        
-        # Check for Qwen-specific indicators
-        has_qwen_features = (
-            'qwen' in window_title or
-            'tongyi' in window_title or
-            'alibaba' in window_title or
-            'ai assistant' in window_title
-        )
-        
-        return is_qwen or has_qwen_features
+        app_name, window_title = self._name_and_title(app_info)
+        return (self._NAME_RE.search(app_name) is not None or
+                self._TITLE_RE.search(window_title) is not None)
     
     def send_text(self, text: str, app_info: Dict[str, Any]) -> bool:
         """Send text to Qwen Code"""
         try:
-            # Copy to clipboard
-            pyperclip.copy(text)
-            
-            # Small delay
-            time.sleep(0.1)
+            # Copy to clipboard, unless the text is short enough to type
+            direct = self._stage_text(text)
             
             # Try to focus the Qwen input field
-            self._focus_qwen_input()
+            self._focus_qwen_input(app_info)
             
-            # Paste the text
-            with keyboard.Controller() as controller:
-                controller.press(Key.cmd)
-                controller.press('v')
-                controller.release('v')
-                controller.release(Key.cmd)
-                
-                # Wait a moment for paste to complete
-                time.sleep(0.1)
-                
-                # Press Enter to submit
-                controller.press(Key.enter)
-                controller.release(Key.enter)
+            # One wait covers both the clipboard update and the focus change
+            time.sleep(0.1)
+            
+            # Type or paste the text
+            self._insert_and_submit(text, direct)
             
             self.logger.info("Text sent to Qwen Code and submitted")
             return True
@@ -74,28 +49,30 @@ class QwenCodeHandler(OutputHandler):
             self.logger.error(f"Failed to send text to Qwen: {e}")
             return False
     
-    def _focus_qwen_input(self) -> None:
+    def _focus_qwen_input(self, app_info: Dict[str, Any]) -> None:
         """Try to focus the Qwen input field"""
+        if self._focus_is_fresh(app_info):
+            return
+        
         try:
-            with keyboard.Controller() as controller:
-                # Try common Qwen shortcuts
-                # Cmd+Shift+A for AI assistant
-                controller.press(Key.cmd)
-                controller.press(Key.shift)
-                controller.press('a')
-                controller.release('a')
-                controller.release(Key.shift)
-                controller.release(Key.cmd)
-                
-                time.sleep(0.2)
-                
-                # Alternative: Try Cmd+J for chat panel
-                controller.press(Key.cmd)
-                controller.press('j')
-                controller.release('j')
-                controller.release(Key.cmd)
-                
-                time.sleep(0.1)
+            controller = self._get_controller()
+            
+            # Try common Qwen shortcuts
+            # Cmd+Shift+A for AI assistant
+            controller.press(Key.cmd)
+            controller.press(Key.shift)
+            controller.press('a')
+            controller.release('a')
+            controller.release(Key.shift)
+            controller.release(Key.cmd)
+            
+            time.sleep(0.2)
+            
+            # Alternative: Try Cmd+J for chat panel
+            controller.press(Key.cmd)
+            controller.press('j')
+            controller.release('j')
+            controller.release(Key.cmd)
                 
         except Exception as e:
             self.logger.debug(f"Could not focus Qwen input: {e}")
@@ -2,67 +2,65 @@
 Terminal handler for terminal applications (iTerm, Terminal.app, etc.)
 """
 
-from typing import Dict, Any
-import logging
+from typing import Dict, Any, Tuple
+import re
 import time
-from pynput import keyboard
 from pynput.keyboard import Key
 import pyperclip
 
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from plugins import OutputHandler
+from .. import OutputHandler
 
 
 class TerminalHandler(OutputHandler):
     """Handler for terminal applications"""
     
-    def can_handle(self, app_info: Dict[str, Any]) -> bool:
-        """Check if this is a terminal application"""
-        app_name = app_info.get('name', '').lower()
-        window_title = app_info.get('title', '').lower()
+    # Common terminal applications
+    TERMINAL_APPS = (
+        'terminal', 'iterm', 'iterm2', 'warp', 'alacritty', 'kitty', 'hyper',
+        'wezterm', 'rio', 'tabby', 'gnome-terminal', 'konsole', 'xterm',
+        'urxvt', 'st', 'tilix', 'terminator'
+    )
+    
+    # Window title indicators of a terminal
+    TERMINAL_KEYWORDS = (
+        'terminal', 'shell', 'bash', 'zsh', 'fish', 'ssh', 'powershell',
+        'cmd', 'command', 'prompt', 'tty', 'pts', 'console'
+    )
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
         
-        # Get terminal config for custom app names
-        terminal_config = self.config.get('ai_assistants', {}).get('terminal', {})
+        # Get terminal config for custom app names and title keywords; the
+        # plugin manager passes the ai_assistants section itself
+        terminal_config = self.config.get('ai_assistants', self.config).get('terminal', {})
         detection_config = terminal_config.get('detection', {})
-        config_app_names = [name.lower() for name in detection_config.get('app_names', [])]
-        config_keywords = [kw.lower() for kw in detection_config.get('window_keywords', [])]
-        
-        # Common terminal applications (merge with config)
-        terminal_apps = [
-            'terminal',
-            'iterm',
-            'iterm2',
-            'warp',
-            'alacritty',
-            'kitty',
-            'hyper',
-            'wezterm',
-            'rio',
-            'tabby',
-            'gnome-terminal',
-            'konsole',
-            'xterm',
-            'urxvt',
-            'st',
-            'tilix',
-            'terminator'
-        ] + config_app_names
-        
-        # Check if it's a terminal app
-        is_terminal = any(term in app_name for term in terminal_apps)
+        app_names = self.TERMINAL_APPS + tuple(
+            name.lower() for name in detection_config.get('app_names', []))
+        keywords = self.TERMINAL_KEYWORDS + tuple(
+            kw.lower() for kw in detection_config.get('window_keywords', []))
+        self._match_keywords = app_names + keywords
         
-        # Also check window title for terminal indicators
-        terminal_keywords = [
-            'terminal', 'shell', 'bash', 'zsh', 'fish', 'ssh', 'powershell',
-            'cmd', 'command', 'prompt', 'tty', 'pts', 'console'
-        ] + config_keywords
+        # Built-in lists merged with config, compiled once into alternations
+        self._name_re = self._compile_keywords(app_names)
+        self._title_re = self._compile_keywords(keywords)
         
-        has_terminal_features = any(kw in window_title for kw in terminal_keywords)
+        self.auto_submit = terminal_config.get('auto_submit', True)  # Default to True for convenience
         
-        return is_terminal or has_terminal_features
+        # Cmd+Right / Ctrl+E before pasting can clobber a half-typed line or
+        # misbehave under vi-mode shells, so it is opt-in
+        self.goto_eol = terminal_config.get('goto_eol', False)
+    
+    @staticmethod
+    def _compile_keywords(keywords: Tuple[str, ...]) -> "re.Pattern":
+        """Compile keywords into one substring-matching alternation"""
+        return re.compile('|'.join(map(re.escape, keywords)))
+    
+    def can_handle(self, app_info: Dict[str, Any]) -> bool:
+        """Check if this is a terminal application"""
+        # Check the app name, then the window title for terminal indicators
+        app_name, window_title = self._name_and_title(app_info)
+        return (self._name_re.search(app_name) is not None or
+                self._title_re.search(window_title) is not None)
     
     def send_text(self, text: str, app_info: Dict[str, Any]) -> bool:
         """Send text to terminal application - ensure terminal is focused"""
@@ -70,37 +68,22 @@ class TerminalHandler(OutputHandler):
             # Copy to clipboard
             pyperclip.copy(text)
             
-            # Wait for clipboard to update
-            time.sleep(0.15)  # Slightly longer for terminals
-            
-            # IMPORTANT: Ensure terminal input is focused
-            # In terminals, we need to make sure we're at the command prompt
-            self._ensure_terminal_focus()
-            
-            # Small delay to ensure focus
-            time.sleep(0.1)
-            
-            # Get config for terminal handler
-            terminal_config = self.config.get('ai_assistants', {}).get('terminal', {})
-            auto_submit = terminal_config.get('auto_submit', True)  # Default to True for convenience
-            
-            # Terminals use Cmd+V for paste
-            with keyboard.Controller() as controller:
-                controller.press(Key.cmd)
-                controller.press('v')
-                controller.release('v')
-                controller.release(Key.cmd)
+            # Optionally move to the end of the prompt line first; otherwise
+            # the paste lands at the cursor
+            if self.goto_eol:
+                self._ensure_terminal_focus(app_info)
                 
-                # Wait for paste to complete
+                # Let the cursor move land before pasting
                 time.sleep(0.15)
-                
-                # Press Enter to submit if auto_submit is enabled
-                if auto_submit:
-                    controller.press(Key.enter)
-                    controller.release(Key.enter)
-                    self.logger.info("Text sent to terminal and submitted")
-                else:
-                    self.logger.info("Text pasted to terminal (not auto-submitted)")
+            
+            auto_submit = self.auto_submit
+            
+            # Terminals use Cmd+V for paste; press Enter to submit if auto_submit is enabled
+            self._paste_and_submit(submit=auto_submit)
+            if auto_submit:
+                self.logger.info("Text sent to terminal and submitted")
+            else:
+                self.logger.info("Text pasted to terminal (not auto-submitted)")
             
             return True
             
@@ -108,30 +91,33 @@ class TerminalHandler(OutputHandler):
             self.logger.error(f"Failed to send text to terminal: {e}")
             return False
     
-    def _ensure_terminal_focus(self) -> None:
-        """Ensure terminal input is focused before pasting"""
+    def _ensure_terminal_focus(self, app_info: Dict[str, Any]) -> None:
+        """Move to the end of the prompt line before pasting (goto_eol)"""
+        if self._focus_is_fresh(app_info):
+            return
+        
         try:
-            with keyboard.Controller() as controller:
-                # In terminals, we want to be at the end of the current line
-                # Try multiple methods to ensure we're at the prompt
-                
-                # Method 1: Move cursor to end of line (Cmd+Right on Mac)
-                controller.press(Key.cmd)
-                controller.press(Key.right)
-                controller.release(Key.right)
-                controller.release(Key.cmd)
-                time.sleep(0.05)
-                
-                # Method 2: Alternative - Ctrl+E (end of line) for some terminals
-                # This works in bash/zsh
-                try:
-                    controller.press(Key.ctrl)
-                    controller.press('e')
-                    controller.release('e')
-                    controller.release(Key.ctrl)
-                    time.sleep(0.05)
-                except:
-                    pass  # Some terminals might not support this
+            controller = self._get_controller()
+            
+            # In terminals, we want to be at the end of the current line
+            # Try multiple methods to ensure we're at the prompt
+            
+            # Method 1: Move cursor to end of line (Cmd+Right on Mac)
+            controller.press(Key.cmd)
+            controller.press(Key.right)
+            controller.release(Key.right)
+            controller.release(Key.cmd)
+            time.sleep(0.05)
+            
+            # Method 2: Alternative - Ctrl+E (end of line) for some terminals
+            # This works in bash/zsh
+            try:
+                controller.press(Key.ctrl)
+                controller.press('e')
+                controller.release('e')
+                controller.release(Key.ctrl)
+            except:
+                pass  # Some terminals might not support this
                 
         except Exception as e:
             self.logger.debug(f"Could not ensure terminal focus: {e}")
@@ -147,4 +133,7 @@ class TerminalHandler(OutputHandler):
     def get_description(self) -> str:
         """Get handler description"""
         return "Handler for terminal applications (iTerm, Terminal.app, etc.)"
-
+    
+    def get_match_keywords(self) -> Tuple[str, ...]:
+        """Keywords used by the plugin manager's dispatch index"""
+        return self._match_keywords
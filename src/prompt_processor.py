@@ -3,12 +3,22 @@ Prompt-focused voice command system for AI assistants
 """
 
 import logging
-import time
-import threading
-from typing import Dict, List, Callable, Optional, Any
-from dataclasses import dataclass
+import sys
+from typing import Dict, List, Callable, Optional, Any, Tuple, Deque
+from dataclasses import dataclass, field
 from enum import Enum
 import re
+from collections import deque
+
+
+# Fixed prompt templates returned by the template commands
+_CODE_REVIEW_TEMPLATE = "Please review the selected code and provide feedback on:\n- Code quality and best practices\n- Potential bugs or issues\n- Performance considerations\n- Suggestions for improvement"
+_EXPLAIN_CODE_TEMPLATE = "Please explain the selected code:\n- What does it do?\n- How does it work?\n- What are the key concepts?\n- Any potential issues or improvements?"
+_REFACTOR_TEMPLATE = "Please refactor the selected code to:\n- Improve readability and maintainability\n- Follow best practices\n- Optimize performance\n- Add proper error handling"
+_WRITE_TESTS_TEMPLATE = "Please write comprehensive tests for the selected code:\n- Unit tests for all functions\n- Edge cases and error conditions\n- Integration tests if applicable\n- Mock external dependencies"
+_DOCUMENTATION_TEMPLATE = "Please add comprehensive documentation:\n- Function/class descriptions\n- Parameter and return value documentation\n- Usage examples\n- Any important notes or warnings"
+_OPTIMIZE_TEMPLATE = "Please optimize the selected code for:\n- Performance improvements\n- Memory usage reduction\n- Better algorithm efficiency\n- Maintainability"
+_DEBUG_TEMPLATE = "Please help debug the selected code:\n- Identify potential issues\n- Suggest debugging strategies\n- Provide fixes for any bugs\n- Explain the root cause"
 
 
 class PromptCommandType(Enum):
@@ -20,29 +30,60 @@ class PromptCommandType(Enum):
     CONTEXT_MANAGEMENT = "context_management"
 
 
-@dataclass
+# slots=True needs Python 3.10+; on 3.9 the commands keep a __dict__
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class PromptCommand:
     """Represents a prompt-focused voice command"""
     pattern: str
     command_type: PromptCommandType
-    handler: Callable
+    handler: Optional[Callable]
     description: str
     examples: List[str]
     requires_confirmation: bool = False
     priority: int = 1
+    # Format string applied to the match groups in place of calling handler
+    template: Optional[str] = None
+    compiled: re.Pattern = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        """Compile the pattern once so dispatch skips the re module cache"""
+        object.__setattr__(self, 'compiled', re.compile(self.pattern, re.IGNORECASE))
 
 
 class PromptVoiceProcessor:
     """Voice command processor optimized for AI prompt dictation"""
     
+    # Leading literal alternation of a pattern, e.g. "^(ask|question|query)\s". The
+    # group must be unquantified and end at whitespace or the end of the pattern, so
+    # its first word is also the first whitespace-separated word of any match.
+    _LEADING_WORDS_RE = re.compile(r"^\^\(([\w' |]+)\)(?=\\s|\$)")
+    
+    # Pattern that is nothing but literal phrases, e.g. "^(send|submit|go)$"
+    _LITERAL_PATTERN_RE = re.compile(r"^\^\(([\w' |]+)\)\$$")
+    
+    # Numeric or named backreference; renumbered groups would break these inside an
+    # alternation. Escaped backslashes also count, which only costs the fast path.
+    _BACKREFERENCE_RE = re.compile(r"\\[1-9]|\(\?P=")
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.commands: List[PromptCommand] = []
-        self.prompt_history: List[str] = []
+        self.prompt_history: Deque[str] = deque(maxlen=20)
         self.current_prompt: str = ""
         
+        # Combined dispatchers keyed by first word (None when not keyed), rebuilt on change
+        self._ordered_commands: List[PromptCommand] = []
+        self._dispatchers: Dict[Optional[str], Optional[Tuple[re.Pattern, Dict[str, Tuple[int, int, int]]]]] = {}
+        self._keyed_dispatch: bool = False
+        self._literal_commands: Dict[str, int] = {}
+        self._available_commands: Optional[List[Dict[str, Any]]] = None
+        
         # Initialize prompt-focused command registry
         self._register_prompt_commands()
+        self._rebuild_dispatcher()
     
     def _register_prompt_commands(self) -> None:
         """Register prompt-focused voice commands"""
@@ -62,55 +103,143 @@ class PromptVoiceProcessor:
         # Context management commands
         self._register_context_commands()
     
+    def _rebuild_dispatcher(self) -> None:
+        """Group commands by first word and combine each group into one alternation"""
+        self._ordered_commands = sorted(self.commands, key=lambda c: c.priority, reverse=True)
+        command_words = self._collect_command_words(self._ordered_commands)
+        self._keyed_dispatch = command_words is not None
+        if command_words is None:
+            command_words = {None: list(range(len(self._ordered_commands)))}
+        
+        self._dispatchers = {
+            word: self._compile_dispatcher(indices)
+            for word, indices in command_words.items()
+        }
+        self._literal_commands = self._collect_literal_commands()
+    
+    def _collect_literal_commands(self) -> Dict[str, int]:
+        """Map each phrase of a literal-only pattern to its command index
+        
+        Phrases an earlier-ranked pattern also matches ("optimize this" is
+        caught by the optimize request) stay on the regex path so the
+        priority order is unchanged.
+        """
+        literals: Dict[str, int] = {}
+        for index, command in enumerate(self._ordered_commands):
+            exact = self._LITERAL_PATTERN_RE.match(command.pattern)
+            if not exact:
+                continue
+            for phrase in exact.group(1).lower().split('|'):
+                if phrase in literals:
+                    continue
+                first = next(i for i, c in enumerate(self._ordered_commands) if c.compiled.match(phrase))
+                if first == index:
+                    literals[phrase] = index
+        return literals
+    
+    def _collect_command_words(self, commands: List[PromptCommand]) -> Optional[Dict[str, List[int]]]:
+        """Map each word that can start a command to its command indices, or None if any pattern lacks a literal prefix"""
+        words: Dict[str, List[int]] = {}
+        for index, command in enumerate(commands):
+            leading = self._LEADING_WORDS_RE.match(command.pattern)
+            if not leading:
+                return None
+            for alternative in leading.group(1).split('|'):
+                if not alternative.strip():
+                    return None
+                indices = words.setdefault(alternative.split()[0].lower(), [])
+                if not indices or indices[-1] != index:
+                    indices.append(index)
+        return words
+    
+    def _compile_dispatcher(self, indices: List[int]) -> Optional[Tuple[Optional[re.Pattern], Dict[str, Tuple[int, int, int]], int]]:
+        """Combine the given commands into one alternation, keeping their priority order
+        
+        The alternation stops before the first pattern with a backreference; the
+        returned resume index is where the per-command scan picks up on no match.
+        """
+        table = {}
+        branches = []
+        group_index = 1
+        resume = len(self._ordered_commands)
+        for index in indices:
+            command = self._ordered_commands[index]
+            if self._BACKREFERENCE_RE.search(command.pattern):
+                resume = index
+                break
+            name = f"cmd{index}"
+            group_count = command.compiled.groups
+            branches.append(f"(?P<{name}>{command.pattern})")
+            # (command index, first and last+1 position of its own groups in match.groups())
+            table[name] = (index, group_index, group_index + group_count)
+            group_index += group_count + 1
+        
+        if not branches:
+            return None, table, resume
+        
+        try:
+            return re.compile("|".join(branches), re.IGNORECASE), table, resume
+        except re.error as e:
+            # Custom patterns that can't be embedded fall back to a per-command scan
+            self.logger.debug(f"Combined command pattern unavailable, scanning per command: {e}")
+            return None
+    
     def _register_prompt_input_commands(self) -> None:
         """Register prompt input commands"""
         commands = [
             PromptCommand(
                 pattern=r"^(ask|question|query)\s+(.+)$",
                 command_type=PromptCommandType.PROMPT_INPUT,
-                handler=self._handle_ask_question,
+                handler=None,
+                template="{1}",
                 description="Ask a question or make a query",
                 examples=["ask how to implement authentication", "question about React hooks", "query database optimization"]
             ),
             PromptCommand(
                 pattern=r"^(explain|describe|tell me about)\s+(.+)$",
                 command_type=PromptCommandType.PROMPT_INPUT,
-                handler=self._handle_explain_request,
+                handler=None,
+                template="Explain {1}",
                 description="Request explanation or description",
                 examples=["explain async await", "describe React lifecycle", "tell me about TypeScript"]
             ),
             PromptCommand(
                 pattern=r"^(help me|assist me|guide me)\s+(.+)$",
                 command_type=PromptCommandType.PROMPT_INPUT,
-                handler=self._handle_help_request,
+                handler=None,
+                template="Help with {1}",
                 description="Request help or assistance",
                 examples=["help me debug this error", "assist me with API integration", "guide me through deployment"]
             ),
             PromptCommand(
                 pattern=r"^(create|make|build|generate)\s+(.+)$",
                 command_type=PromptCommandType.PROMPT_INPUT,
-                handler=self._handle_create_request,
+                handler=None,
+                template="Create {1}",
                 description="Request creation or generation",
                 examples=["create a login form", "make a REST API", "build a React component", "generate test cases"]
             ),
             PromptCommand(
                 pattern=r"^(fix|debug|solve|resolve)\s+(.+)$",
                 command_type=PromptCommandType.PROMPT_INPUT,
-                handler=self._handle_fix_request,
+                handler=None,
+                template="Fix {1}",
                 description="Request fixing or debugging",
                 examples=["fix this error", "debug the authentication issue", "solve the performance problem"]
             ),
             PromptCommand(
                 pattern=r"^(optimize|improve|enhance)\s+(.+)$",
                 command_type=PromptCommandType.PROMPT_INPUT,
-                handler=self._handle_optimize_request,
+                handler=None,
+                template="Optimize {1}",
                 description="Request optimization or improvement",
                 examples=["optimize this function", "improve the database query", "enhance the user interface"]
             ),
             PromptCommand(
                 pattern=r"^(review|analyze|evaluate)\s+(.+)$",
                 command_type=PromptCommandType.PROMPT_INPUT,
-                handler=self._handle_review_request,
+                handler=None,
+                template="Review {1}",
                 description="Request review or analysis",
                 examples=["review this code", "analyze the performance", "evaluate the security"]
             ),
@@ -171,49 +300,56 @@ class PromptVoiceProcessor:
             PromptCommand(
                 pattern=r"^(code review|review code)$",
                 command_type=PromptCommandType.PROMPT_TEMPLATE,
-                handler=self._handle_code_review_template,
+                handler=None,
+                template=_CODE_REVIEW_TEMPLATE,
                 description="Code review template",
                 examples=["code review", "review code"]
             ),
             PromptCommand(
                 pattern=r"^(explain code|explain this)$",
                 command_type=PromptCommandType.PROMPT_TEMPLATE,
-                handler=self._handle_explain_code_template,
+                handler=None,
+                template=_EXPLAIN_CODE_TEMPLATE,
                 description="Code explanation template",
                 examples=["explain code", "explain this"]
             ),
             PromptCommand(
                 pattern=r"^(refactor|refactor this)$",
                 command_type=PromptCommandType.PROMPT_TEMPLATE,
-                handler=self._handle_refactor_template,
+                handler=None,
+                template=_REFACTOR_TEMPLATE,
                 description="Code refactoring template",
                 examples=["refactor", "refactor this"]
             ),
             PromptCommand(
                 pattern=r"^(write tests|create tests|add tests)$",
                 command_type=PromptCommandType.PROMPT_TEMPLATE,
-                handler=self._handle_write_tests_template,
+                handler=None,
+                template=_WRITE_TESTS_TEMPLATE,
                 description="Test writing template",
                 examples=["write tests", "create tests", "add tests"]
             ),
             PromptCommand(
                 pattern=r"^(documentation|add docs|write docs)$",
                 command_type=PromptCommandType.PROMPT_TEMPLATE,
-                handler=self._handle_documentation_template,
+                handler=None,
+                template=_DOCUMENTATION_TEMPLATE,
                 description="Documentation template",
                 examples=["documentation", "add docs", "write docs"]
             ),
             PromptCommand(
                 pattern=r"^(optimize|optimize this)$",
                 command_type=PromptCommandType.PROMPT_TEMPLATE,
-                handler=self._handle_optimize_template,
+                handler=None,
+                template=_OPTIMIZE_TEMPLATE,
                 description="Optimization template",
                 examples=["optimize", "optimize this"]
             ),
             PromptCommand(
                 pattern=r"^(debug|debug this)$",
                 command_type=PromptCommandType.PROMPT_TEMPLATE,
-                handler=self._handle_debug_template,
+                handler=None,
+                template=_DEBUG_TEMPLATE,
                 description="Debugging template",
                 examples=["debug", "debug this"]
             ),
@@ -310,21 +446,48 @@ class PromptVoiceProcessor:
             
             # Add to prompt history
             self.prompt_history.append(text)
-            if len(self.prompt_history) > 20:
-                self.prompt_history.pop(0)
             
             # Find matching command (but don't add enhancements)
-            for command in sorted(self.commands, key=lambda c: c.priority, reverse=True):
-                match = re.match(command.pattern, text.lower())
+            start = len(self._ordered_commands)
+            index = self._literal_commands.get(text.lower())
+            if index is not None:
+                # Whole utterance is a command phrase ("send", "undo"), which is its only group
+                result = self._run_command(self._ordered_commands[index], (text,))
+                if result:
+                    return result
+                start = index + 1
+            else:
+                if self._keyed_dispatch:
+                    words = text.split(None, 1)
+                    key = words[0].lower() if words else ""
+                else:
+                    key = None
+                
+                # Plain dictation whose first word starts no command skips matching entirely
+                if key in self._dispatchers:
+                    dispatcher = self._dispatchers[key]
+                    if dispatcher is None:
+                        start = 0
+                    else:
+                        dispatch_re, table, resume = dispatcher
+                        match = dispatch_re.match(text) if dispatch_re else None
+                        if match:
+                            index, first, last = table[match.lastgroup]
+                            result = self._run_command(self._ordered_commands[index], match.groups()[first:last])
+                            if result:
+                                return result
+                            
+                            # Empty result: keep looking among lower-ranked commands
+                            start = index + 1
+                        else:
+                            # Commands left out of the alternation are matched one by one
+                            start = resume
+            
+            for command in self._ordered_commands[start:]:
+                match = command.compiled.match(text)
                 if match:
-                    self.logger.info(f"Matched prompt command: {command.description}")
-                    
-                    # Execute command
-                    result = command.handler(match.groups())
-                    
+                    result = self._run_command(command, match.groups())
                     if result:
-                        # Update current prompt
-                        self.current_prompt = result
                         return result
             
             # No command matched, treat as regular prompt text (return as-is)
@@ -335,42 +498,18 @@ class PromptVoiceProcessor:
             self.logger.error(f"Prompt command processing failed: {e}")
             return text
     
-    # Command handlers - simplified, no enhancements
-    def _handle_ask_question(self, groups: tuple) -> str:
-        """Handle ask question command"""
-        question = groups[1] if len(groups) > 1 else ""
-        return question if question else ""
-    
-    def _handle_explain_request(self, groups: tuple) -> str:
-        """Handle explain request command"""
-        topic = groups[1] if len(groups) > 1 else ""
-        return f"Explain {topic}" if topic else ""
-    
-    def _handle_help_request(self, groups: tuple) -> str:
-        """Handle help request command"""
-        task = groups[1] if len(groups) > 1 else ""
-        return f"Help with {task}" if task else ""
-    
-    def _handle_create_request(self, groups: tuple) -> str:
-        """Handle create request command"""
-        item = groups[1] if len(groups) > 1 else ""
-        return f"Create {item}" if item else ""
-    
-    def _handle_fix_request(self, groups: tuple) -> str:
-        """Handle fix request command"""
-        issue = groups[1] if len(groups) > 1 else ""
-        return f"Fix {issue}" if issue else ""
-    
-    def _handle_optimize_request(self, groups: tuple) -> str:
-        """Handle optimize request command"""
-        target = groups[1] if len(groups) > 1 else ""
-        return f"Optimize {target}" if target else ""
-    
-    def _handle_review_request(self, groups: tuple) -> str:
-        """Handle review request command"""
-        target = groups[1] if len(groups) > 1 else ""
-        return f"Review {target}" if target else ""
+    def _run_command(self, command: PromptCommand, groups: tuple) -> Optional[str]:
+        """Execute a matched command, making a non-empty result the current prompt"""
+        self.logger.info(f"Matched prompt command: {command.description}")
+        if command.template is not None:
+            result = command.template.format(*groups)
+        else:
+            result = command.handler(groups)
+        if result:
+            self.current_prompt = result
+        return result
     
+    # Command handlers - simplified, no enhancements
     def _handle_add_to_prompt(self, groups: tuple) -> str:
         """Handle add to prompt command"""
         addition = groups[1] if len(groups) > 1 else ""
@@ -412,34 +551,6 @@ class PromptVoiceProcessor:
             return f"{self.current_prompt}. Please provide detailed explanations and examples."
         return "Please provide a detailed solution with examples."
     
-    def _handle_code_review_template(self, groups: tuple) -> str:
-        """Handle code review template"""
-        return "Please review the selected code and provide feedback on:\n- Code quality and best practices\n- Potential bugs or issues\n- Performance considerations\n- Suggestions for improvement"
-    
-    def _handle_explain_code_template(self, groups: tuple) -> str:
-        """Handle explain code template"""
-        return "Please explain the selected code:\n- What does it do?\n- How does it work?\n- What are the key concepts?\n- Any potential issues or improvements?"
-    
-    def _handle_refactor_template(self, groups: tuple) -> str:
-        """Handle refactor template"""
-        return "Please refactor the selected code to:\n- Improve readability and maintainability\n- Follow best practices\n- Optimize performance\n- Add proper error handling"
-    
-    def _handle_write_tests_template(self, groups: tuple) -> str:
-        """Handle write tests template"""
-        return "Please write comprehensive tests for the selected code:\n- Unit tests for all functions\n- Edge cases and error conditions\n- Integration tests if applicable\n- Mock external dependencies"
-    
-    def _handle_documentation_template(self, groups: tuple) -> str:
-        """Handle documentation template"""
-        return "Please add comprehensive documentation:\n- Function/class descriptions\n- Parameter and return value documentation\n- Usage examples\n- Any important notes or warnings"
-    
-    def _handle_optimize_template(self, groups: tuple) -> str:
-        """Handle optimize template"""
-        return "Please optimize the selected code for:\n- Performance improvements\n- Memory usage reduction\n- Better algorithm efficiency\n- Maintainability"
-    
-    def _handle_debug_template(self, groups: tuple) -> str:
-        """Handle debug template"""
-        return "Please help debug the selected code:\n- Identify potential issues\n- Suggest debugging strategies\n- Provide fixes for any bugs\n- Explain the root cause"
-    
     def _handle_send_prompt(self, groups: tuple) -> str:
         """Handle send prompt command"""
         return "SEND_PROMPT"
@@ -500,22 +611,24 @@ class PromptVoiceProcessor:
         """Get current prompt"""
         return self.current_prompt
     
-    def get_prompt_history(self) -> List[str]:
+    def get_prompt_history(self) -> Tuple[str, ...]:
         """Get prompt history"""
-        return self.prompt_history.copy()
+        return tuple(self.prompt_history)
     
     def get_available_commands(self) -> List[Dict[str, Any]]:
         """Get list of available commands"""
-        return [
-            {
-                "pattern": cmd.pattern,
-                "type": cmd.command_type.value,
-                "description": cmd.description,
-                "examples": cmd.examples,
-                "priority": cmd.priority
-            }
-            for cmd in self.commands
-        ]
+        if self._available_commands is None:
+            self._available_commands = [
+                {
+                    "pattern": cmd.pattern,
+                    "type": cmd.command_type.value,
+                    "description": cmd.description,
+                    "examples": cmd.examples,
+                    "priority": cmd.priority
+                }
+                for cmd in self.commands
+            ]
+        return list(self._available_commands)
     
     def get_commands_by_type(self, command_type: PromptCommandType) -> List[PromptCommand]:
         """Get commands by type"""
@@ -524,6 +637,8 @@ class PromptVoiceProcessor:
     def add_custom_command(self, command: PromptCommand) -> None:
         """Add a custom command"""
         self.commands.append(command)
+        self._available_commands = None
+        self._rebuild_dispatcher()
         self.logger.info(f"Added custom prompt command: {command.description}")
     
     def reset_prompt(self) -> None:
@@ -4,11 +4,138 @@ Prompt-focused text processing for natural language optimization
 
 import re
 import logging
-from typing import Dict, List, Tuple, Optional
+import functools
+from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
 
 
-@dataclass
+# Whitespace and punctuation cleanup, compiled once for every call
+_SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([,.!?;:])')
+_REPEATED_PUNCT_RE = re.compile(r'([,.!?;:])\s*([,.!?;:])')
+_SPACE_BEFORE_END_PUNCT_RE = re.compile(r'\s+([,.!?])')
+_REPEATED_END_PUNCT_RE = re.compile(r'([,.!?])\s*([,.!?])')
+_FILLER_WORDS_RE = re.compile(r'\b(?:um|uh)\b', re.IGNORECASE)
+_WORD_RE = re.compile(r'[a-z0-9+#]+')
+
+# Prompt restructuring helpers
+_LOWERCASE_STATEMENT_RE = re.compile(r'^[a-z][^?]*$')
+_LEADING_HOW_RE = re.compile(r'.*how\s+', re.IGNORECASE)
+_LEADING_WHAT_RE = re.compile(r'.*what\s+', re.IGNORECASE)
+_REDUNDANT_PHRASES = [
+    (re.compile(r'\bplease\s+please\b', re.IGNORECASE), 'please'),
+    (re.compile(r'\bhelp\s+me\s+help\b', re.IGNORECASE), 'help me'),
+    (re.compile(r'\bcan\s+you\s+can\s+you\b', re.IGNORECASE), 'can you'),
+]
+
+# Domain wording appended by _add_domain_context and _develop_prompt_intelligently
+_DOMAIN_CONTEXTS = {
+    "frontend": " (focusing on modern frontend best practices)",
+    "backend": " (focusing on backend architecture and best practices)",
+    "database": " (focusing on database design and optimization)",
+    "api": " (focusing on API design and best practices)",
+    "testing": " (focusing on testing strategies and best practices)",
+    "deployment": " (focusing on deployment strategies and best practices)",
+}
+_DOMAIN_PHRASES = {
+    "frontend": "following modern frontend best practices",
+    "backend": "following backend architecture best practices",
+    "database": "following database design best practices",
+    "api": "following API design best practices",
+    "testing": "following testing best practices",
+    "deployment": "following deployment best practices",
+}
+
+# Follow-up prompt suggestions offered for each intent
+_PROMPT_SUGGESTIONS = {
+    "question": (
+        "What are the best practices for this?",
+        "How can I implement this efficiently?",
+        "What are the common pitfalls to avoid?",
+        "How does this compare to alternatives?",
+    ),
+    "creation_request": (
+        "Please create this with proper error handling",
+        "Please include unit tests",
+        "Please add documentation",
+        "Please follow best practices",
+    ),
+    "fix_request": (
+        "Please explain the root cause",
+        "Please provide a comprehensive fix",
+        "Please suggest prevention strategies",
+        "Please include testing recommendations",
+    ),
+}
+
+# Enhancement phrases stripped from prompts before they are sent
+_ENHANCEMENT_PHRASES = (
+    # Best practices and structure
+    'with best practices and proper structure',
+    'with best practices',
+    'following best practices',
+    'following modern frontend best practices',
+    'following backend architecture best practices',
+    'following database design best practices',
+    'following API design best practices',
+    'following testing best practices',
+    'following testing strategies and best practices',
+    'following deployment best practices',
+    'following deployment strategies and best practices',
+    'proper structure',
+    
+    # Detailed explanations
+    'Please provide detailed explanations with examples',
+    'Please provide detailed explanations',
+    'with detailed explanations',
+    'in detail with examples',
+    'in detail',
+    'with examples',
+    
+    # Comprehensive solutions
+    'Please provide a comprehensive solution with detailed explanations',
+    'Please provide a comprehensive solution',
+    'comprehensive solution',
+    
+    # Implementation details
+    'Please provide the complete implementation',
+    'complete implementation',
+    'Please include best practices and error handling',
+    'with error handling',
+    
+    # Context and guidance
+    'Please consider the existing codebase context',
+    'Please consider the existing code',
+    'Please provide detailed guidance',
+    'Please provide a clear, actionable answer',
+    'clear, actionable answer',
+    
+    # Root cause and solutions
+    'Please identify the root cause and provide a solution',
+    'root cause and solution',
+    
+    # Code quality phrases
+    'focusing on modern frontend best practices',
+    'focusing on backend architecture and best practices',
+    'focusing on database design and best practices',
+    'focusing on API design and best practices',
+    'focusing on testing strategies and best practices',
+    'focusing on deployment strategies and best practices',
+    
+    # Assistant-specific additions
+    'Please explain the issue and provide the fix',
+    'Please provide the complete code with comments',
+    'Please analyze the current code and provide a fix',
+)
+
+# All enhancement phrases in one alternation, longest first so a phrase wins
+# over any shorter phrase it starts with
+_ENHANCEMENT_PHRASES_RE = re.compile(
+    r'\s+(?:' + '|'.join(re.escape(phrase) for phrase in sorted(_ENHANCEMENT_PHRASES, key=len, reverse=True)) + r')\.?',
+    re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
 class PromptContext:
     """Context information for prompt processing"""
     intent: str  # question, request, command, explanation
@@ -17,185 +144,281 @@ class PromptContext:
     complexity: str = "medium"  # simple, medium, complex
 
 
+def _load_prompt_patterns() -> Dict[str, str]:
+    """Load patterns for prompt optimization"""
+    patterns = {
+        # Question patterns
+        r'\bhow\s+do\s+i\s+(.+)\?': r'How can I \1?',
+        r'\bwhat\s+is\s+(.+)\?': r'What is \1 and how does it work?',
+        r'\bwhy\s+does\s+(.+)\?': r'Why does \1 happen and how can I fix it?',
+        r'\bwhen\s+should\s+i\s+(.+)\?': r'When should I \1 and what are the best practices?',
+        r'\bwhere\s+can\s+i\s+(.+)\?': r'Where can I \1 and what are the options?',
+        
+        # Request patterns
+        r'\bcan\s+you\s+(.+)\?': r'Please \1.',
+        r'\bcould\s+you\s+(.+)\?': r'Please \1.',
+        r'\bwould\s+you\s+(.+)\?': r'Please \1.',
+        r'\bi\s+need\s+(.+)': r'I need help with \1.',
+        r'\bi\s+want\s+(.+)': r'I would like \1.',
+        
+        # Command patterns
+        r'\bmake\s+(.+)': r'Please create \1.',
+        r'\bbuild\s+(.+)': r'Please build \1.',
+        r'\bcreate\s+(.+)': r'Please create \1.',
+        r'\bfix\s+(.+)': r'Please help me fix \1.',
+        r'\bdebug\s+(.+)': r'Please help me debug \1.',
+        r'\boptimize\s+(.+)': r'Please optimize \1.',
+        
+        # Explanation patterns
+        r'\bexplain\s+(.+)': r'Please explain \1 in detail.',
+        r'\bdescribe\s+(.+)': r'Please describe \1.',
+        r'\btell\s+me\s+about\s+(.+)': r'Please tell me about \1.',
+        r'\bshow\s+me\s+(.+)': r'Please show me \1.',
+    }
+    return patterns
+
+
+def _compile_prompt_patterns(patterns: Dict[str, str]) -> Tuple[re.Pattern, Dict[str, str]]:
+    """Combine the prompt patterns into one alternation and renumber each replacement's groups"""
+    branches = []
+    templates = {}
+    group_index = 1
+    for index, (pattern, replacement) in enumerate(patterns.items()):
+        name = f"p{index}"
+        branches.append(f"(?P<{name}>{pattern})")
+        # \N in the replacement refers to group N of its own pattern
+        templates[name] = re.sub(r'\\(\d)', lambda ref: rf'\g<{group_index + int(ref.group(1))}>', replacement)
+        group_index += re.compile(pattern).groups + 1
+    return re.compile('|'.join(branches), re.IGNORECASE), templates
+
+
+def _load_natural_language_map() -> Dict[str, str]:
+    """Load natural language improvements"""
+    language_map = {
+        # Common transcription errors
+        'um': '',
+        'uh': '',
+        'like': '',
+        'you know': '',
+        'i mean': '',
+        'actually': '',
+        'basically': '',
+        'literally': '',
+        'obviously': '',
+        'clearly': '',
+        
+        # Coding terminology improvements
+        'function': 'function',
+        'method': 'method',
+        'variable': 'variable',
+        'constant': 'constant',
+        'class': 'class',
+        'object': 'object',
+        'array': 'array',
+        'string': 'string',
+        'number': 'number',
+        'boolean': 'boolean',
+        'null': 'null',
+        'undefined': 'undefined',
+        'true': 'true',
+        'false': 'false',
+        
+        # Common abbreviations
+        'api': 'API',
+        'url': 'URL',
+        'http': 'HTTP',
+        'https': 'HTTPS',
+        'json': 'JSON',
+        'xml': 'XML',
+        'html': 'HTML',
+        'css': 'CSS',
+        'js': 'JavaScript',
+        'ts': 'TypeScript',
+        'react': 'React',
+        'vue': 'Vue',
+        'angular': 'Angular',
+        'node': 'Node.js',
+        'python': 'Python',
+        'java': 'Java',
+        'cpp': 'C++',
+        'csharp': 'C#',
+        'sql': 'SQL',
+        'db': 'database',
+        'ui': 'user interface',
+        'ux': 'user experience',
+        'ui/ux': 'user interface and user experience',
+        
+        # Technical terms
+        'authentication': 'authentication',
+        'authorization': 'authorization',
+        'encryption': 'encryption',
+        'decryption': 'decryption',
+        'hashing': 'hashing',
+        'caching': 'caching',
+        'optimization': 'optimization',
+        'performance': 'performance',
+        'scalability': 'scalability',
+        'maintainability': 'maintainability',
+        'readability': 'readability',
+        'testability': 'testability',
+        'debugging': 'debugging',
+        'testing': 'testing',
+        'deployment': 'deployment',
+        'devops': 'DevOps',
+        'ci/cd': 'CI/CD',
+        'microservices': 'microservices',
+        'rest': 'REST',
+        'graphql': 'GraphQL',
+        'websocket': 'WebSocket',
+        'jwt': 'JWT',
+        'oauth': 'OAuth',
+        'cors': 'CORS',
+        'csrf': 'CSRF',
+        'xss': 'XSS',
+        'sql injection': 'SQL injection',
+    }
+    # Identity entries document known terms but would only lowercase them
+    return {word: replacement for word, replacement in language_map.items() if word != replacement}
+
+
+def _compile_natural_language_re(language_map: Dict[str, str]) -> re.Pattern:
+    """Combine the map keys into one alternation, longest first so phrases win over their words"""
+    keys = sorted(language_map, key=len, reverse=True)
+    # Matches are whole whitespace-separated words, optionally followed by sentence
+    # punctuation, so '.', '/', '-' and "'" inside a token (node.js, like-minded,
+    # URLs) block a match. A preceding comma, the leading whitespace and a trailing
+    # comma are captured so removed words can take them along.
+    return re.compile(
+        r'(,?)(\s*)(?<!\S)(' + '|'.join(map(re.escape, keys)) + r')(?=[,.!?;:]*(?:\s|$))(,?)',
+        re.IGNORECASE
+    )
+
+
+def _load_enhancement_rules() -> List[Dict[str, Any]]:
+    """Load prompt enhancement rules"""
+    rules = [
+        {
+            'pattern': r'\b(help|assist|guide)\s+me\s+with\s+(.+)',
+            'enhancement': r'I need help with \2. Please provide step-by-step guidance.',
+            'intent': 'help_request'
+        },
+        {
+            'pattern': r'\b(create|make|build)\s+(.+)',
+            'enhancement': r'Please create \2 with best practices and proper structure.',
+            'intent': 'creation_request'
+        },
+        {
+            'pattern': r'\b(fix|debug|solve)\s+(.+)',
+            'enhancement': r'Please help me fix \2. Include the root cause and solution.',
+            'intent': 'fix_request'
+        },
+        {
+            'pattern': r'\b(explain|describe)\s+(.+)',
+            'enhancement': r'Please explain \2 in detail with examples.',
+            'intent': 'explanation_request'
+        },
+        {
+            'pattern': r'\b(optimize|improve|enhance)\s+(.+)',
+            'enhancement': r'Please optimize \2 for better performance and maintainability.',
+            'intent': 'optimization_request'
+        },
+        {
+            'pattern': r'\b(review|analyze|evaluate)\s+(.+)',
+            'enhancement': r'Please review \2 and provide detailed feedback.',
+            'intent': 'review_request'
+        },
+    ]
+    for rule in rules:
+        rule['pattern'] = re.compile(rule['pattern'], re.IGNORECASE)
+    return rules
+
+
+# Loaded once at import and shared by every PromptTextProcessor
+_PROMPT_PATTERNS = _load_prompt_patterns()
+_PROMPT_PATTERNS_RE, _PROMPT_TEMPLATES = _compile_prompt_patterns(_PROMPT_PATTERNS)
+_NATURAL_LANGUAGE_MAP = _load_natural_language_map()
+_NATURAL_LANGUAGE_RE = _compile_natural_language_re(_NATURAL_LANGUAGE_MAP)
+_ENHANCEMENT_RULES = _load_enhancement_rules()
+_ENHANCEMENT_RULES_BY_INTENT = {rule['intent']: rule for rule in _ENHANCEMENT_RULES}
+
+
 class PromptTextProcessor:
     """Processes transcribed text optimized for AI prompt generation"""
     
+    # Keyword tables for _detect_prompt_context: (label, words, phrases), checked
+    # in order. Words match whole tokens, phrases match as substrings.
+    INTENT_KEYWORDS = (
+        ("question", frozenset({'how', 'what', 'why', 'when', 'where'}), ('?',)),
+        ("help_request", frozenset({'help', 'assist', 'guide'}), ()),
+        ("creation_request", frozenset({'create', 'make', 'build', 'generate'}), ()),
+        ("fix_request", frozenset({'fix', 'debug', 'solve', 'resolve'}), ()),
+        ("explanation_request", frozenset({'explain', 'describe'}), ('tell me',)),
+        ("optimization_request", frozenset({'optimize', 'improve', 'enhance'}), ()),
+        ("review_request", frozenset({'review', 'analyze', 'evaluate'}), ()),
+    )
+    DOMAIN_KEYWORDS = (
+        ("frontend", frozenset({'react', 'vue', 'angular', 'javascript', 'js'}), ()),
+        ("backend", frozenset({'node', 'python', 'java', 'php', 'ruby'}), ()),
+        ("database", frozenset({'database', 'sql', 'mongodb', 'postgresql'}), ()),
+        ("api", frozenset({'api', 'rest', 'graphql', 'microservices'}), ()),
+        ("testing", frozenset({'test', 'tests', 'testing', 'integration'}), ()),
+        ("deployment", frozenset({'deploy', 'deployment', 'devops'}), ('ci/cd',)),
+    )
+    URGENCY_KEYWORDS = (
+        ("high", frozenset({'urgent', 'asap', 'immediately', 'quickly'}), ()),
+        ("low", frozenset({'whenever', 'eventually'}), ('no rush',)),
+    )
+    COMPLEXITY_KEYWORDS = (
+        ("simple", frozenset({'simple', 'basic', 'easy', 'quick'}), ()),
+        ("complex", frozenset({'complex', 'advanced', 'sophisticated', 'detailed'}), ()),
+    )
+    
+    # Whole-token signals for _aggressively_restructure_prompt
+    QUESTION_WORDS = frozenset({'how', 'what', 'why', 'when', 'where', 'who', 'which'})
+    REQUEST_WORDS = frozenset({'please', 'help', 'create', 'make', 'build', 'fix', 'explain'})
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
         # Prompt optimization patterns
-        self.prompt_patterns = self._load_prompt_patterns()
+        self.prompt_patterns = _PROMPT_PATTERNS
         
-        # Natural language improvements
-        self.natural_language_map = self._load_natural_language_map()
+        # Natural language improvements, matched as words or phrases in one pass
+        self.natural_language_map = _NATURAL_LANGUAGE_MAP
+        self._natural_language_re = _NATURAL_LANGUAGE_RE
         
         # Prompt enhancement rules
-        self.enhancement_rules = self._load_enhancement_rules()
-    
-    def _load_prompt_patterns(self) -> Dict[str, str]:
-        """Load patterns for prompt optimization"""
-        return {
-            # Question patterns
-            r'\bhow\s+do\s+i\s+(.+)\?': r'How can I \1?',
-            r'\bwhat\s+is\s+(.+)\?': r'What is \1 and how does it work?',
-            r'\bwhy\s+does\s+(.+)\?': r'Why does \1 happen and how can I fix it?',
-            r'\bwhen\s+should\s+i\s+(.+)\?': r'When should I \1 and what are the best practices?',
-            r'\bwhere\s+can\s+i\s+(.+)\?': r'Where can I \1 and what are the options?',
-            
-            # Request patterns
-            r'\bcan\s+you\s+(.+)\?': r'Please \1.',
-            r'\bcould\s+you\s+(.+)\?': r'Please \1.',
-            r'\bwould\s+you\s+(.+)\?': r'Please \1.',
-            r'\bi\s+need\s+(.+)': r'I need help with \1.',
-            r'\bi\s+want\s+(.+)': r'I would like \1.',
-            
-            # Command patterns
-            r'\bmake\s+(.+)': r'Please create \1.',
-            r'\bbuild\s+(.+)': r'Please build \1.',
-            r'\bcreate\s+(.+)': r'Please create \1.',
-            r'\bfix\s+(.+)': r'Please help me fix \1.',
-            r'\bdebug\s+(.+)': r'Please help me debug \1.',
-            r'\boptimize\s+(.+)': r'Please optimize \1.',
-            
-            # Explanation patterns
-            r'\bexplain\s+(.+)': r'Please explain \1 in detail.',
-            r'\bdescribe\s+(.+)': r'Please describe \1.',
-            r'\btell\s+me\s+about\s+(.+)': r'Please tell me about \1.',
-            r'\bshow\s+me\s+(.+)': r'Please show me \1.',
-        }
-    
-    def _load_natural_language_map(self) -> Dict[str, str]:
-        """Load natural language improvements"""
-        return {
-            # Common transcription errors
-            'um': '',
-            'uh': '',
-            'like': '',
-            'you know': '',
-            'i mean': '',
-            'actually': '',
-            'basically': '',
-            'literally': '',
-            'obviously': '',
-            'clearly': '',
-            
-            # Coding terminology improvements
-            'function': 'function',
-            'method': 'method',
-            'variable': 'variable',
-            'constant': 'constant',
-            'class': 'class',
-            'object': 'object',
-            'array': 'array',
-            'string': 'string',
-            'number': 'number',
-            'boolean': 'boolean',
-            'null': 'null',
-            'undefined': 'undefined',
-            'true': 'true',
-            'false': 'false',
-            
-            # Common abbreviations
-            'api': 'API',
-            'url': 'URL',
-            'http': 'HTTP',
-            'https': 'HTTPS',
-            'json': 'JSON',
-            'xml': 'XML',
-            'html': 'HTML',
-            'css': 'CSS',
-            'js': 'JavaScript',
-            'ts': 'TypeScript',
-            'react': 'React',
-            'vue': 'Vue',
-            'angular': 'Angular',
-            'node': 'Node.js',
-            'python': 'Python',
-            'java': 'Java',
-            'cpp': 'C++',
-            'csharp': 'C#',
-            'sql': 'SQL',
-            'db': 'database',
-            'ui': 'user interface',
-            'ux': 'user experience',
-            'ui/ux': 'user interface and user experience',
-            
-            # Technical terms
-            'authentication': 'authentication',
-            'authorization': 'authorization',
-            'encryption': 'encryption',
-            'decryption': 'decryption',
-            'hashing': 'hashing',
-            'caching': 'caching',
-            'optimization': 'optimization',
-            'performance': 'performance',
-            'scalability': 'scalability',
-            'maintainability': 'maintainability',
-            'readability': 'readability',
-            'testability': 'testability',
-            'debugging': 'debugging',
-            'testing': 'testing',
-            'deployment': 'deployment',
-            'devops': 'DevOps',
-            'ci/cd': 'CI/CD',
-            'microservices': 'microservices',
-            'rest': 'REST',
-            'graphql': 'GraphQL',
-            'websocket': 'WebSocket',
-            'jwt': 'JWT',
-            'oauth': 'OAuth',
-            'cors': 'CORS',
-            'csrf': 'CSRF',
-            'xss': 'XSS',
-            'sql injection': 'SQL injection',
-        }
-    
-    def _load_enhancement_rules(self) -> List[Dict[str, str]]:
-        """Load prompt enhancement rules"""
-        return [
-            {
-                'pattern': r'\b(help|assist|guide)\s+me\s+with\s+(.+)',
-                'enhancement': r'I need help with \2. Please provide step-by-step guidance.',
-                'intent': 'help_request'
-            },
-            {
-                'pattern': r'\b(create|make|build)\s+(.+)',
-                'enhancement': r'Please create \2 with best practices and proper structure.',
-                'intent': 'creation_request'
-            },
-            {
-                'pattern': r'\b(fix|debug|solve)\s+(.+)',
-                'enhancement': r'Please help me fix \2. Include the root cause and solution.',
-                'intent': 'fix_request'
-            },
-            {
-                'pattern': r'\b(explain|describe)\s+(.+)',
-                'enhancement': r'Please explain \2 in detail with examples.',
-                'intent': 'explanation_request'
-            },
-            {
-                'pattern': r'\b(optimize|improve|enhance)\s+(.+)',
-                'enhancement': r'Please optimize \2 for better performance and maintainability.',
-                'intent': 'optimization_request'
-            },
-            {
-                'pattern': r'\b(review|analyze|evaluate)\s+(.+)',
-                'enhancement': r'Please review \2 and provide detailed feedback.',
-                'intent': 'review_request'
-            },
-        ]
+        self.enhancement_rules = _ENHANCEMENT_RULES
+        self._rules_by_intent = _ENHANCEMENT_RULES_BY_INTENT
+        
+        # Repeated utterances (retries, short confirmations) reuse earlier results
+        self.process_prompt_text = functools.lru_cache(maxsize=256)(self._process_prompt_text)
+        self.enhance_for_ai_assistant = functools.lru_cache(maxsize=256)(self._enhance_for_ai_assistant)
     
-    def process_prompt_text(self, text: str) -> Tuple[str, PromptContext]:
+    def _process_prompt_text(self, text: str) -> Tuple[str, PromptContext]:
         """Process transcribed text for optimal prompt generation"""
         try:
             # Clean and normalize text
             cleaned_text = self._clean_text(text)
             
+            # Empty or single-word utterances (VAD noise, "yes") skip context
+            # detection and the rewrite patterns
+            if not cleaned_text:
+                return "", PromptContext(intent="unknown")
+            if ' ' not in cleaned_text:
+                single_word = self._apply_natural_language_improvements(cleaned_text)
+                # A filler word alone ("um", "like.") leaves at most punctuation
+                if single_word != cleaned_text and not single_word.strip(' ,.!?;:'):
+                    return "", PromptContext(intent="unknown")
+                return self._final_cleanup(single_word), PromptContext(intent="unknown")
+            
             # Detect prompt context
             context = self._detect_prompt_context(cleaned_text)
             
             # Apply natural language improvements
             improved_text = self._apply_natural_language_improvements(cleaned_text)
+            if not improved_text.strip(' ,.!?;:'):
+                return "", context
             
             # Apply prompt patterns
             optimized_text = self._apply_prompt_patterns(improved_text)
@@ -217,140 +440,102 @@ class PromptTextProcessor:
     def _clean_text(self, text: str) -> str:
         """Clean and normalize input text - minimal processing"""
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = ' '.join(text.split())
         
         # Remove common filler words (but keep it minimal)
-        filler_words = ['um', 'uh']
-        for word in filler_words:
-            text = re.sub(rf'\b{word}\b', '', text, flags=re.IGNORECASE)
+        text = _FILLER_WORDS_RE.sub('', text)
         
         # Fix common punctuation issues
-        text = re.sub(r'\s+([,.!?;:])', r'\1', text)
-        text = re.sub(r'([,.!?;:])\s*([,.!?;:])', r'\1', text)
+        text = _SPACE_BEFORE_PUNCT_RE.sub(r'\1', text)
+        text = _REPEATED_PUNCT_RE.sub(r'\1', text)
         
         return text.strip()
     
     def _detect_prompt_context(self, text: str) -> PromptContext:
         """Detect the context of the prompt"""
         text_lower = text.lower()
-        
-        # Detect intent
-        intent = "unknown"
-        if any(word in text_lower for word in ['how', 'what', 'why', 'when', 'where', '?']):
-            intent = "question"
-        elif any(word in text_lower for word in ['help', 'assist', 'guide']):
-            intent = "help_request"
-        elif any(word in text_lower for word in ['create', 'make', 'build', 'generate']):
-            intent = "creation_request"
-        elif any(word in text_lower for word in ['fix', 'debug', 'solve', 'resolve']):
-            intent = "fix_request"
-        elif any(word in text_lower for word in ['explain', 'describe', 'tell me']):
-            intent = "explanation_request"
-        elif any(word in text_lower for word in ['optimize', 'improve', 'enhance']):
-            intent = "optimization_request"
-        elif any(word in text_lower for word in ['review', 'analyze', 'evaluate']):
-            intent = "review_request"
-        
-        # Detect domain
-        domain = None
-        if any(tech in text_lower for tech in ['react', 'vue', 'angular', 'javascript', 'js']):
-            domain = "frontend"
-        elif any(tech in text_lower for tech in ['node', 'python', 'java', 'php', 'ruby']):
-            domain = "backend"
-        elif any(tech in text_lower for tech in ['database', 'sql', 'mongodb', 'postgresql']):
-            domain = "database"
-        elif any(tech in text_lower for tech in ['api', 'rest', 'graphql', 'microservices']):
-            domain = "api"
-        elif any(word in text_lower for word in ['test', 'testing', 'unit test', 'integration']):
-            domain = "testing"
-        elif any(word in text_lower for word in ['deploy', 'deployment', 'devops', 'ci/cd']):
-            domain = "deployment"
-        
-        # Detect urgency
-        urgency = "normal"
-        if any(word in text_lower for word in ['urgent', 'asap', 'immediately', 'quickly']):
-            urgency = "high"
-        elif any(word in text_lower for word in ['whenever', 'eventually', 'no rush']):
-            urgency = "low"
-        
-        # Detect complexity
-        complexity = "medium"
-        if any(word in text_lower for word in ['simple', 'basic', 'easy', 'quick']):
-            complexity = "simple"
-        elif any(word in text_lower for word in ['complex', 'advanced', 'sophisticated', 'detailed']):
-            complexity = "complex"
+        tokens = set(_WORD_RE.findall(text_lower))
         
         return PromptContext(
-            intent=intent,
-            domain=domain,
-            urgency=urgency,
-            complexity=complexity
+            intent=self._match_keywords(tokens, text_lower, self.INTENT_KEYWORDS, "unknown"),
+            domain=self._match_keywords(tokens, text_lower, self.DOMAIN_KEYWORDS, None),
+            urgency=self._match_keywords(tokens, text_lower, self.URGENCY_KEYWORDS, "normal"),
+            complexity=self._match_keywords(tokens, text_lower, self.COMPLEXITY_KEYWORDS, "medium")
         )
     
+    @staticmethod
+    def _match_keywords(tokens: set, text_lower: str, table: tuple, default: Optional[str]) -> Optional[str]:
+        """Return the label of the first keyword table entry found in the text"""
+        for label, words, phrases in table:
+            if not tokens.isdisjoint(words) or any(phrase in text_lower for phrase in phrases):
+                return label
+        return default
+    
     def _apply_natural_language_improvements(self, text: str) -> str:
         """Apply natural language improvements"""
-        words = text.split()
-        improved_words = []
-        
-        for word in words:
-            # Check for exact matches
-            if word.lower() in self.natural_language_map:
-                improved_words.append(self.natural_language_map[word.lower()])
-            else:
-                improved_words.append(word)
-        
-        return ' '.join(improved_words)
+        # One scan replaces every known word or phrase ("you know", "sql injection")
+        return self._natural_language_re.sub(self._replace_natural_language, text)
+    
+    def _replace_natural_language(self, match: re.Match) -> str:
+        """Replacement for one natural language match; empty mappings drop the word, its space and comma"""
+        preceding_comma, leading, word, comma = match.groups()
+        replacement = self.natural_language_map.get(word.lower(), word)
+        if replacement:
+            return preceding_comma + leading + replacement + comma
+        # A removed word ending a sentence or clause takes the comma before it too
+        rest = match.string[match.end():]
+        if not rest.strip() or rest[0] in '.!?;:':
+            return ''
+        return preceding_comma
     
     def _apply_prompt_patterns(self, text: str) -> str:
         """Apply prompt optimization patterns"""
-        for pattern, replacement in self.prompt_patterns.items():
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-        
-        return text
+        # One scan; the earliest keyword in the text decides the rewrite
+        return _PROMPT_PATTERNS_RE.sub(lambda match: match.expand(_PROMPT_TEMPLATES[match.lastgroup]), text)
     
     def _apply_enhancement_rules(self, text: str, context: PromptContext) -> str:
         """Apply enhancement rules based on context"""
-        for rule in self.enhancement_rules:
-            if re.search(rule['pattern'], text, re.IGNORECASE):
-                # Check if the rule matches the detected intent
-                if rule['intent'] == context.intent:
-                    text = re.sub(rule['pattern'], rule['enhancement'], text, flags=re.IGNORECASE)
-                    break
+        # Only the rule for the detected intent can apply
+        rule = self._rules_by_intent.get(context.intent)
+        if rule:
+            match = rule['pattern'].search(text)
+            if match:
+                # The pattern runs to the end of the line, so this is its only match
+                text = text[:match.start()] + match.expand(rule['enhancement']) + text[match.end():]
         
         # Add context-specific enhancements
         if context.domain:
             text = self._add_domain_context(text, context.domain)
         
         if context.complexity == "simple":
-            text += " Please keep it simple and straightforward."
+            text = self._append_once(text, " Please keep it simple and straightforward.")
         elif context.complexity == "complex":
-            text += " Please provide detailed explanations and examples."
+            text = self._append_once(text, " Please provide detailed explanations and examples.")
         
         if context.urgency == "high":
-            text += " This is urgent, please prioritize."
+            text = self._append_once(text, " This is urgent, please prioritize.")
         
         return text
     
+    @staticmethod
+    def _append_once(text: str, suffix: str) -> str:
+        """Append suffix unless the text already carries it (re-processed prompts)"""
+        if suffix.strip().lower() in text.lower():
+            return text
+        return text + suffix
+    
     def _add_domain_context(self, text: str, domain: str) -> str:
         """Add domain-specific context to prompt"""
-        domain_contexts = {
-            "frontend": " (focusing on modern frontend best practices)",
-            "backend": " (focusing on backend architecture and best practices)",
-            "database": " (focusing on database design and optimization)",
-            "api": " (focusing on API design and best practices)",
-            "testing": " (focusing on testing strategies and best practices)",
-            "deployment": " (focusing on deployment strategies and best practices)",
-        }
-        
-        if domain in domain_contexts:
-            text += domain_contexts[domain]
+        domain_context = _DOMAIN_CONTEXTS.get(domain)
+        if domain_context:
+            text = self._append_once(text, domain_context)
         
         return text
     
     def _final_cleanup(self, text: str) -> str:
         """Final cleanup and formatting"""
         # Remove extra spaces
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = ' '.join(text.split())
         
         # Ensure proper sentence structure
         if not text.endswith(('.', '!', '?')):
@@ -369,23 +554,24 @@ class PromptTextProcessor:
         
         # Handle incomplete sentences - add context
         if not text.endswith(('.', '!', '?', ':', ';')):
+            # Whole tokens, so "show" or "however" don't read as questions
+            tokens = set(_WORD_RE.findall(text_lower))
             # Check if it's a question
-            if any(word in text_lower for word in ['how', 'what', 'why', 'when', 'where', 'who', 'which']):
+            if not tokens.isdisjoint(self.QUESTION_WORDS):
                 if not text.endswith('?'):
                     text += '?'
             else:
                 # It's likely a statement - make it a request
-                if not any(word in text_lower for word in ['please', 'help', 'create', 'make', 'build', 'fix', 'explain']):
+                if tokens.isdisjoint(self.REQUEST_WORDS):
                     # Add a polite request prefix
                     if text_lower.startswith(('i ', 'i\'m ', 'i\'ve ', 'i\'ll ')):
-                        text = text.replace('i ', 'I ', 1).replace('i\'m ', 'I\'m ', 1).replace('i\'ve ', 'I\'ve ', 1).replace('i\'ll ', 'I\'ll ', 1)
-                        text = f"Please help me with {text.lower()}"
+                        text = f"Please help me with {text_lower}"
                     else:
                         text = f"Please {text}"
         
         # Fix common speech patterns
         # "authorization in a system" -> "How to implement authorization in a system"
-        if re.match(r'^[a-z][^?]*$', text_lower) and len(text.split()) < 8:
+        if _LOWERCASE_STATEMENT_RE.match(text_lower) and len(text.split()) < 8:
             # Short statement without question - likely needs expansion
             if 'authorization' in text_lower or 'authentication' in text_lower:
                 text = f"How to implement {text}?"
@@ -410,11 +596,11 @@ class PromptTextProcessor:
             if not text_lower.startswith(('how', 'what', 'why', 'when', 'where', 'who', 'which', 'can', 'could', 'would', 'should')):
                 # Not a proper question - restructure
                 if 'how' in text_lower:
-                    text = re.sub(r'.*how\s+', 'How ', text, flags=re.IGNORECASE)
+                    text = _LEADING_HOW_RE.sub('How ', text)
                 elif 'what' in text_lower:
-                    text = re.sub(r'.*what\s+', 'What ', text, flags=re.IGNORECASE)
+                    text = _LEADING_WHAT_RE.sub('What ', text)
                 else:
-                    text = f"How can I {text.lower()}?"
+                    text = f"How can I {text_lower}?"
         
         elif context.intent == "creation_request":
             # Ensure creation requests are specific
@@ -443,17 +629,9 @@ class PromptTextProcessor:
         
         # Add domain-specific context if detected
         if context.domain:
-            domain_phrases = {
-                "frontend": "following modern frontend best practices",
-                "backend": "following backend architecture best practices",
-                "database": "following database design best practices",
-                "api": "following API design best practices",
-                "testing": "following testing best practices",
-                "deployment": "following deployment best practices"
-            }
-            if context.domain in domain_phrases:
-                if domain_phrases[context.domain] not in text_lower:
-                    text += f" {domain_phrases[context.domain].capitalize()}."
+            phrase = _DOMAIN_PHRASES.get(context.domain)
+            if phrase and phrase not in text_lower:
+                text += f" {phrase.capitalize()}."
         
         return text
     
@@ -463,13 +641,8 @@ class PromptTextProcessor:
         text = text.strip()
         
         # Remove redundant phrases
-        redundant_phrases = [
-            (r'\bplease\s+please\b', 'please'),
-            (r'\bhelp\s+me\s+help\b', 'help me'),
-            (r'\bcan\s+you\s+can\s+you\b', 'can you'),
-        ]
-        for pattern, replacement in redundant_phrases:
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+        for pattern, replacement in _REDUNDANT_PHRASES:
+            text = pattern.sub(replacement, text)
         
         # Ensure proper capitalization
         if text and text[0].islower():
@@ -484,7 +657,8 @@ class PromptTextProcessor:
         
         # Add clarity markers for complex requests
         if context.complexity == "complex":
-            if 'detailed' not in text.lower() and 'comprehensive' not in text.lower():
+            text_lower = text.lower()
+            if 'detailed' not in text_lower and 'comprehensive' not in text_lower:
                 text = text.rstrip('.!?') + " Please provide a comprehensive solution with detailed explanations."
         
         # Ensure minimum clarity
@@ -499,7 +673,7 @@ class PromptTextProcessor:
         
         return text
     
-    def enhance_for_ai_assistant(self, text: str, assistant_type: str = "general") -> str:
+    def _enhance_for_ai_assistant(self, text: str, assistant_type: str = "general") -> str:
         """Enhance prompt specifically for AI assistant - minimal processing, no aggressive enhancements"""
         try:
             # Just do basic cleanup - no aggressive restructuring or adding phrases
@@ -525,76 +699,13 @@ class PromptTextProcessor:
     
     def _strip_enhancement_phrases(self, text: str) -> str:
         """Strip out common enhancement phrases that were automatically added"""
-        import re
-        
-        # List of enhancement phrases to remove
-        enhancement_phrases = [
-            # Best practices and structure
-            r'\s+with best practices and proper structure\.?',
-            r'\s+with best practices\.?',
-            r'\s+following best practices\.?',
-            r'\s+following modern frontend best practices\.?',
-            r'\s+following backend architecture best practices\.?',
-            r'\s+following database design best practices\.?',
-            r'\s+following API design best practices\.?',
-            r'\s+following testing best practices\.?',
-            r'\s+following testing strategies and best practices\.?',
-            r'\s+following deployment best practices\.?',
-            r'\s+following deployment strategies and best practices\.?',
-            r'\s+proper structure\.?',
-            
-            # Detailed explanations
-            r'\s+Please provide detailed explanations with examples\.?',
-            r'\s+Please provide detailed explanations\.?',
-            r'\s+with detailed explanations\.?',
-            r'\s+in detail with examples\.?',
-            r'\s+in detail\.?',
-            r'\s+with examples\.?',
-            
-            # Comprehensive solutions
-            r'\s+Please provide a comprehensive solution with detailed explanations\.?',
-            r'\s+Please provide a comprehensive solution\.?',
-            r'\s+comprehensive solution\.?',
-            
-            # Implementation details
-            r'\s+Please provide the complete implementation\.?',
-            r'\s+complete implementation\.?',
-            r'\s+Please include best practices and error handling\.?',
-            r'\s+with error handling\.?',
-            
-            # Context and guidance
-            r'\s+Please consider the existing codebase context\.?',
-            r'\s+Please consider the existing code\.?',
-            r'\s+Please provide detailed guidance\.?',
-            r'\s+Please provide a clear, actionable answer\.?',
-            r'\s+clear, actionable answer\.?',
-            
-            # Root cause and solutions
-            r'\s+Please identify the root cause and provide a solution\.?',
-            r'\s+root cause and solution\.?',
-            
-            # Code quality phrases
-            r'\s+focusing on modern frontend best practices\.?',
-            r'\s+focusing on backend architecture and best practices\.?',
-            r'\s+focusing on database design and best practices\.?',
-            r'\s+focusing on API design and best practices\.?',
-            r'\s+focusing on testing strategies and best practices\.?',
-            r'\s+focusing on deployment strategies and best practices\.?',
-            
-            # Assistant-specific additions
-            r'\s+Please explain the issue and provide the fix\.?',
-            r'\s+Please provide the complete code with comments\.?',
-            r'\s+Please analyze the current code and provide a fix\.?',
-        ]
-        
-        # Remove each enhancement phrase
-        for phrase in enhancement_phrases:
-            text = re.sub(phrase, '', text, flags=re.IGNORECASE)
+        # Remove every enhancement phrase in one pass
+        text = _ENHANCEMENT_PHRASES_RE.sub('', text)
         
         # Clean up any double spaces or trailing punctuation issues
-        text = re.sub(r'\s+', ' ', text)  # Multiple spaces to single
-        text = re.sub(r'\s+([,.!?])', r'\1', text)  # Space before punctuation
-        text = re.sub(r'([,.!?])\s*([,.!?])', r'\1', text)  # Multiple punctuation
+        text = ' '.join(text.split())  # Multiple spaces to single
+        text = _SPACE_BEFORE_END_PUNCT_RE.sub(r'\1', text)  # Space before punctuation
+        text = _REPEATED_END_PUNCT_RE.sub(r'\1', text)  # Multiple punctuation
         
         return text.strip()
     
@@ -632,28 +743,5 @@ class PromptTextProcessor:
     
     def get_prompt_suggestions(self, context: PromptContext) -> List[str]:
         """Get prompt suggestions based on context"""
-        suggestions = []
-        
-        if context.intent == "question":
-            suggestions.extend([
-                "What are the best practices for this?",
-                "How can I implement this efficiently?",
-                "What are the common pitfalls to avoid?",
-                "How does this compare to alternatives?"
-            ])
-        elif context.intent == "creation_request":
-            suggestions.extend([
-                "Please create this with proper error handling",
-                "Please include unit tests",
-                "Please add documentation",
-                "Please follow best practices"
-            ])
-        elif context.intent == "fix_request":
-            suggestions.extend([
-                "Please explain the root cause",
-                "Please provide a comprehensive fix",
-                "Please suggest prevention strategies",
-                "Please include testing recommendations"
-            ])
-        
-        return suggestions
+        # Fresh list so callers may extend or reorder it
+        return list(_PROMPT_SUGGESTIONS.get(context.intent, ()))
@@ -5,10 +5,16 @@ Simple WhisperControl - Voice prompts for AI assistants
 
 import sys
 import os
+import re
 import time
 import logging
+import queue
+import threading
 import argparse
 from pathlib import Path
+from typing import Optional
+
+import numpy as np
 
 # Add src to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -22,6 +28,29 @@ from pynput import keyboard
 from pynput.keyboard import Key
 
 
+# Filler words dropped from prompts, matched as whole whitespace-separated words
+_FILLER_RE = re.compile(
+    r'(?<!\S)(?:um|uh|like|actually|basically|you\s+know|i\s+mean)(?!\S)',
+    re.IGNORECASE
+)
+
+
+def _char_to_vk(char: str) -> Optional[int]:
+    """Virtual key code for a character on the current layout, where pynput can tell us"""
+    try:
+        if sys.platform == 'darwin':
+            from pynput._util.darwin import get_unicode_to_keycode_map
+            return get_unicode_to_keycode_map().get(char)
+        if sys.platform == 'win32':
+            import ctypes
+            vk = ctypes.windll.user32.VkKeyScanW(ord(char)) & 0xff
+            return vk if vk != 0xff else None
+    except Exception:
+        pass
+    # X11 reports keysyms rather than key codes, so characters match by char only
+    return None
+
+
 class SimpleWhisperControl:
     """Simple WhisperControl without complex plugins"""
     
@@ -34,15 +63,46 @@ class SimpleWhisperControl:
         self.whisper_transcriber = WhisperTranscriber(self.config)
         self.system_integration = SystemIntegration(self.config)
         
-        # State
-        self.is_running = False
-        self.current_recording_file = None
+        # State; set to stop the main loop
+        self._stop_event = threading.Event()
+        
+        # Hotkey state, driven by the press/release listener
+        self.hotkey_listener = None
+        self._hotkey_keys = frozenset()
+        self._pressed_keys = set()
+        self._hotkey_active = False
+        self._release_event = threading.Event()
+        
+        # One recording at a time; held from hotkey press until its audio is taken
+        self._recording_lock = threading.Lock()
+        
+        # Recordings are transcribed and pasted in order by a single worker
+        self._recordings: queue.Queue = queue.Queue()
+        threading.Thread(target=self._processing_loop, daemon=True).start()
+        
+        # Reused for every paste instead of opening a new event source each time
+        self._controller = keyboard.Controller()
         
         # Setup logging
         self._setup_logging()
         
+        # Warm the model and input device in the background so the first prompt isn't slow
+        self._warmup_done = threading.Event()
+        threading.Thread(target=self._warmup, daemon=True).start()
+        
         self.logger.info("Simple WhisperControl initialized")
     
+    def _warmup(self):
+        """Run one silent transcription and check the input device ahead of the first hotkey press"""
+        try:
+            self.audio_capture.check_input_device()
+            self.whisper_transcriber.transcribe_array(np.zeros(16000, dtype=np.float32))
+            self.logger.info("Warmup complete")
+        except Exception as e:
+            self.logger.warning(f"Warmup failed: {e}")
+        finally:
+            self._warmup_done.set()
+    
     def _setup_logging(self):
         """Setup logging configuration"""
         log_level = getattr(logging, self.config.log_level.upper(), logging.INFO)
@@ -63,15 +123,13 @@ class SimpleWhisperControl:
             # Setup hotkey listener
             self._setup_hotkey_listener()
             
-            self.is_running = True
             self.logger.info("Simple WhisperControl started successfully")
             
             # Print usage instructions
             self._print_usage_instructions()
             
-            # Keep running
-            while self.is_running:
-                time.sleep(0.1)
+            # Keep running; blocks without waking until stop() is called
+            self._stop_event.wait()
                 
         except KeyboardInterrupt:
             self.logger.info("Received interrupt signal")
@@ -83,69 +141,80 @@ class SimpleWhisperControl:
     def stop(self):
         """Stop WhisperControl"""
         self.logger.info("Stopping Simple WhisperControl...")
-        self.is_running = False
+        self._stop_event.set()
+        
+        if self.hotkey_listener:
+            self.hotkey_listener.stop()
     
     def _setup_hotkey_listener(self):
         """Setup hotkey listener"""
         try:
-            # Parse hotkey from config
-            hotkey_parts = self.config.hotkey_combination.split('+')
-            
-            # Convert to pynput keys
-            keys = []
-            for part in hotkey_parts:
-                part = part.strip().lower()
-                if part == 'cmd':
-                    keys.append(Key.cmd)
-                elif part == 'shift':
-                    keys.append(Key.shift)
-                elif part == 'ctrl':
-                    keys.append(Key.ctrl)
-                elif part == 'alt':
-                    keys.append(Key.alt)
-                elif part == '9':
-                    keys.append('9')
-                else:
-                    keys.append(part)
-            
-            # Create hotkey string for GlobalHotKeys
-            hotkey_string = '+'.join(str(k) for k in keys)
-            
-            # Create listener
-            listener = keyboard.GlobalHotKeys({
-                hotkey_string: self._on_hotkey_press
-            })
+            self._hotkey_keys = self._parse_hotkey(self.config.hotkey_combination)
             
-            listener.start()
+            # Track presses and releases so recording stops when the hotkey is let go
+            self.hotkey_listener = keyboard.Listener(
+                on_press=self._on_key_press,
+                on_release=self._on_key_release
+            )
+            self.hotkey_listener.start()
             self.logger.info(f"Hotkey listener started for: {self.config.hotkey_combination}")
             
         except Exception as e:
             self.logger.error(f"Failed to setup hotkey listener: {e}")
-            # Fallback to simple key listener
-            self._setup_simple_listener()
     
-    def _setup_simple_listener(self):
-        """Setup simple key listener as fallback"""
-        try:
-            self.logger.info("Setting up simple key listener...")
-            
-            def on_press(key):
-                try:
-                    # Check for Shift+9
-                    if hasattr(key, 'char') and key.char == '9':
-                        # Check if shift is pressed
-                        with keyboard.Controller() as controller:
-                            if controller.pressed(Key.shift):
-                                self._on_hotkey_press()
-                except AttributeError:
-                    pass
-            
-            listener = keyboard.Listener(on_press=on_press)
-            listener.start()
-            self.logger.info("Simple key listener started")
-            
-        except Exception as e:
-            self.logger.error(f"Failed to setup simple listener: {e}")
+    @staticmethod
+    def _parse_hotkey(combination: str) -> frozenset:
+        """Convert a hotkey string such as 'cmd+shift+space' to canonical pynput keys"""
+        # HotKey.parse yields the same form as Listener.canonical: modifiers as Key,
+        # everything else as KeyCode ('space' becomes its vk)
+        parts = [part.strip().lower() for part in combination.split('+')]
+        keys = set()
+        for key in keyboard.HotKey.parse('+'.join(part if len(part) == 1 else f'<{part}>' for part in parts)):
+            # Character keys match by vk where known, so 'shift+9' still matches
+            # when the press arrives as '('
+            vk = _char_to_vk(key.char) if getattr(key, 'char', None) else None
+            keys.add(keyboard.KeyCode.from_vk(vk) if vk is not None else key)
+        return frozenset(keys)
+    
+    def _match_hotkey_key(self, key):
+        """Return the hotkey entry a pressed or released key stands for, or None"""
+        canonical = self.hotkey_listener.canonical(key)
+        if canonical in self._hotkey_keys:
+            return canonical
+        
+        vk = getattr(key, 'vk', None)
+        if vk is not None:
+            by_vk = keyboard.KeyCode.from_vk(vk)
+            if by_vk in self._hotkey_keys:
+                return by_vk
+        return None
+    
+    def _on_key_press(self, key):
+        """Start a recording once every hotkey key is held"""
+        key = self._match_hotkey_key(key)
+        if key is None:
+            return
+        
+        self._pressed_keys.add(key)
+        if not self._hotkey_active and self._pressed_keys >= self._hotkey_keys:
+            if not self._recording_lock.acquire(blocking=False):
+                self.logger.debug("Hotkey ignored - a recording is already in progress")
+                return
+            self._hotkey_active = True
+            self._release_event.clear()
+            # Record off the listener thread so release events keep arriving
+            threading.Thread(target=self._on_hotkey_press, daemon=True).start()
+    
+    def _on_key_release(self, key):
+        """Stop the recording when any hotkey key is released"""
+        key = self._match_hotkey_key(key)
+        if key is None:
+            return
+        
+        self._pressed_keys.discard(key)
+        if self._hotkey_active:
+            self._hotkey_active = False
+            self._release_event.set()
     
     def _on_hotkey_press(self):
         """Handle hotkey press"""
@@ -161,30 +230,41 @@ class SimpleWhisperControl:
             # Stop recording
             self.audio_capture.stop_recording()
             
-            # Process the recording
-            self._process_recording()
+            # Take the audio out of the buffer before the next recording can start
+            if not self.audio_capture.audio_data:
+                self.logger.warning("No audio recorded")
+                return
+            audio = self.audio_capture.get_pcm_float32()
+            self.audio_capture.clear_recording()
+            
+            # Queue it for the processing worker
+            self._recordings.put(audio)
             
         except Exception as e:
             self.logger.error(f"Error handling hotkey: {e}")
+        finally:
+            self._recording_lock.release()
     
     def _wait_for_hotkey_release(self):
         """Wait for hotkey to be released"""
-        # Simple implementation - wait a bit then stop
-        time.sleep(2)  # Record for 2 seconds
+        if not self._release_event.wait(timeout=self.config.max_recording_duration):
+            self.logger.warning("Maximum recording duration reached")
     
-    def _process_recording(self):
+    def _processing_loop(self):
+        """Transcribe and send queued recordings one at a time, in recording order"""
+        while True:
+            audio = self._recordings.get()
+            self._process_recording(audio)
+    
+    def _process_recording(self, audio: np.ndarray):
         """Process the recorded audio"""
         try:
-            # Save the recording
-            self.current_recording_file = self.audio_capture.save_recording()
-            
-            if not self.current_recording_file:
-                self.logger.warning("No recording file saved")
-                return
+            # Don't share the model with a warmup still in progress
+            self._warmup_done.wait()
             
-            # Transcribe the audio
+            # Transcribe the audio straight from memory
             self.logger.info("Transcribing audio...")
-            transcribed_text = self.whisper_transcriber.transcribe_file(self.current_recording_file)
+            transcribed_text = self.whisper_transcriber.transcribe_array(audio, self.audio_capture.sample_rate)
             
             if transcribed_text:
                 self.logger.info(f"Transcribed: {transcribed_text}")
@@ -199,25 +279,16 @@ class SimpleWhisperControl:
             else:
                 self.logger.warning("Empty transcription")
             
-            # Clean up
-            if self.config.cleanup_temp_files and self.current_recording_file:
-                try:
-                    os.remove(self.current_recording_file)
-                except Exception as e:
-                    self.logger.warning(f"Failed to clean up: {e}")
-            
         except Exception as e:
             self.logger.error(f"Error processing recording: {e}")
     
     def _process_prompt_text(self, text: str) -> str:
         """Simple prompt text processing"""
-        # Remove common filler words
-        filler_words = ['um', 'uh', 'like', 'you know', 'i mean', 'actually', 'basically']
-        words = text.split()
-        filtered_words = [word for word in words if word.lower() not in filler_words]
+        # Remove common filler words, including two-word fillers like "you know"
+        processed = _FILLER_RE.sub('', text)
         
-        # Join back together
-        processed = ' '.join(filtered_words)
+        # Collapse the gaps they leave
+        processed = ' '.join(processed.split())
         
         # Ensure it ends with proper punctuation
         if processed and not processed.endswith(('.', '!', '?')):
@@ -231,15 +302,14 @@ class SimpleWhisperControl:
             # Copy to clipboard
             pyperclip.copy(text)
             
-            # Wait a moment
-            time.sleep(0.1)
+            # Wait a moment for the clipboard to update
+            time.sleep(self.config.paste_settle_ms / 1000)
             
             # Paste with Cmd+V
-            with keyboard.Controller() as controller:
-                controller.press(Key.cmd)
-                controller.press('v')
-                controller.release('v')
-                controller.release(Key.cmd)
+            self._controller.press(Key.cmd)
+            self._controller.press('v')
+            self._controller.release('v')
+            self._controller.release(Key.cmd)
             
             self.logger.info("Text sent successfully")
             
@@ -5,12 +5,19 @@ System integration module for clipboard and paste functionality
 import pyperclip
 import logging
 import time
-from typing import Optional
+from contextlib import contextmanager
+from typing import Iterator, Optional
 from pynput import keyboard
 from pynput.keyboard import Key, Listener
 
 from config import Config
 
+# On macOS talk to the pasteboard directly; pyperclip shells out to pbcopy/pbpaste
+try:
+    from AppKit import NSPasteboard, NSPasteboardTypeString
+except ImportError:
+    NSPasteboard = None
+
 
 class SystemIntegration:
     """System integration for clipboard and paste operations"""
@@ -19,16 +26,31 @@ class SystemIntegration:
         self.config = config
         self.logger = logging.getLogger(__name__)
         
-        # Store original clipboard content
+        # Original clipboard content, saved only inside clipboard_restored()
         self.original_clipboard: Optional[str] = None
+        self._pasteboard = NSPasteboard.generalPasteboard() if NSPasteboard is not None else None
+        
+        # One keyboard controller for every paste and keystroke
+        self._controller = keyboard.Controller()
+    
+    def _read_clipboard(self) -> str:
+        """Read clipboard text through the fastest available backend"""
+        if self._pasteboard is not None:
+            return str(self._pasteboard.stringForType_(NSPasteboardTypeString) or "")
+        return pyperclip.paste()
+    
+    def _write_clipboard(self, text: str) -> None:
+        """Write clipboard text through the fastest available backend"""
+        if self._pasteboard is not None:
+            self._pasteboard.clearContents()
+            self._pasteboard.setString_forType_(text, NSPasteboardTypeString)
+        else:
+            pyperclip.copy(text)
     
     def copy_to_clipboard(self, text: str) -> bool:
         """Copy text to clipboard"""
         try:
-            if self.config.clear_clipboard_first:
-                self.original_clipboard = pyperclip.paste()
-            
-            pyperclip.copy(text)
+            self._write_clipboard(text)
             self.logger.info(f"Text copied to clipboard: {len(text)} characters")
             return True
             
@@ -40,21 +62,18 @@ class SystemIntegration:
         """Paste clipboard content to active application using Cmd+V and submit with Enter"""
         try:
             # Small delay to ensure clipboard is ready
-            time.sleep(0.1)
+            time.sleep(self.config.paste_settle_ms / 1000)
             
             # Simulate Cmd+V
-            with keyboard.Controller() as controller:
-                controller.press(Key.cmd)
-                controller.press('v')
-                controller.release('v')
-                controller.release(Key.cmd)
-                
-                # Wait a moment for paste to complete
-                time.sleep(0.1)
-                
-                # Press Enter to submit
-                controller.press(Key.enter)
-                controller.release(Key.enter)
+            controller = self._controller
+            controller.press(Key.cmd)
+            controller.press('v')
+            controller.release('v')
+            controller.release(Key.cmd)
+            
+            # Press Enter to submit; it is queued behind the paste, so no wait is needed
+            controller.press(Key.enter)
+            controller.release(Key.enter)
             
             self.logger.info("Pasted text to active application and submitted")
             return True
@@ -82,13 +101,26 @@ class SystemIntegration:
             self.logger.error(f"Failed to copy and paste: {e}")
             return False
     
+    @contextmanager
+    def clipboard_restored(self) -> Iterator[None]:
+        """Save the clipboard on entry and put it back on exit"""
+        try:
+            self.original_clipboard = self._read_clipboard()
+        except Exception as e:
+            self.logger.warning(f"Failed to save clipboard: {e}")
+        
+        try:
+            yield
+        finally:
+            self.restore_clipboard()
+    
     def restore_clipboard(self) -> bool:
         """Restore original clipboard content"""
         if self.original_clipboard is None:
             return True
         
         try:
-            pyperclip.copy(self.original_clipboard)
+            self._write_clipboard(self.original_clipboard)
             self.original_clipboard = None
             self.logger.info("Clipboard restored to original content")
             return True
@@ -100,7 +132,7 @@ class SystemIntegration:
     def get_clipboard_content(self) -> str:
         """Get current clipboard content"""
         try:
-            return pyperclip.paste()
+            return self._read_clipboard()
         except Exception as e:
             self.logger.error(f"Failed to get clipboard content: {e}")
             return ""
@@ -108,7 +140,7 @@ class SystemIntegration:
     def clear_clipboard(self) -> bool:
         """Clear clipboard content"""
         try:
-            pyperclip.copy("")
+            self._write_clipboard("")
             self.logger.info("Clipboard cleared")
             return True
         except Exception as e:
@@ -122,8 +154,8 @@ class SystemIntegration:
             time.sleep(0.1)
             
             # Type the text directly
-            with keyboard.Controller() as controller:
-                controller.type(text)
+            controller = self._controller
+            controller.type(text)
             
             self.logger.info(f"Text sent directly to active application: {len(text)} characters")
             return True
@@ -135,23 +167,23 @@ class SystemIntegration:
     def simulate_keystrokes(self, keys: list) -> bool:
         """Simulate a sequence of keystrokes"""
         try:
-            with keyboard.Controller() as controller:
-                for key in keys:
-                    if isinstance(key, str):
-                        controller.press(key)
-                        controller.release(key)
-                    elif isinstance(key, Key):
-                        controller.press(key)
-                        controller.release(key)
-                    else:
-                        # Handle key combinations
-                        controller.press(key)
-                
-                # Release any remaining keys
-                controller.release(Key.cmd)
-                controller.release(Key.ctrl)
-                controller.release(Key.alt)
-                controller.release(Key.shift)
+            controller = self._controller
+            for key in keys:
+                if isinstance(key, str):
+                    controller.press(key)
+                    controller.release(key)
+                elif isinstance(key, Key):
+                    controller.press(key)
+                    controller.release(key)
+                else:
+                    # Handle key combinations
+                    controller.press(key)
+            
+            # Release any remaining keys
+            controller.release(Key.cmd)
+            controller.release(Key.ctrl)
+            controller.release(Key.alt)
+            controller.release(Key.shift)
             
             self.logger.info(f"Simulated {len(keys)} keystrokes")
             return True
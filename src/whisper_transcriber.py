@@ -8,6 +8,7 @@ import time
 from pathlib import Path
 from typing import Optional, Dict, Any
 import torch
+import numpy as np
 
 from config import Config
 
@@ -23,6 +24,8 @@ class WhisperTranscriber:
         self.model: Optional[whisper.Whisper] = None
         self.model_name = config.whisper_model
         self.language = config.whisper_language
+        self.device = "cpu"
+        self.fp16 = False
         
         # Load model on initialization
         self._load_model()
@@ -32,10 +35,16 @@ class WhisperTranscriber:
         try:
             self.logger.info(f"Loading Whisper model: {self.model_name}")
             
-            # Check if CUDA is available
-            device = "cuda" if torch.cuda.is_available() else "cpu"
+            # Use CUDA when available unless a device is configured
+            device = self.config.whisper_device
+            if device == "auto":
+                device = "cuda" if torch.cuda.is_available() else "cpu"
             self.logger.info(f"Using device: {device}")
             
+            # Half precision halves encoder bandwidth on GPU; CPU inference is FP32 only
+            self.device = device
+            self.fp16 = self.config.whisper_fp16 and device == "cuda"
+            
             # Load the model
             self.model = whisper.load_model(self.model_name, device=device)
             
@@ -64,7 +73,7 @@ class WhisperTranscriber:
             result = self.model.transcribe(
                 audio_file_path,
                 language=language,
-                fp16=False,  # Disable fp16 for better compatibility
+                fp16=self.fp16,  # Half precision on CUDA only
                 condition_on_previous_text=True,  # Better context understanding
                 temperature=0.0,  # More deterministic, better for accents
                 best_of=2,  # Try 2 candidates for better accuracy
@@ -233,7 +242,7 @@ class WhisperTranscriber:
             result = self.model.transcribe(
                 audio_data,
                 language=language,
-                fp16=False,
+                fp16=self.fp16,
                 condition_on_previous_text=True,
                 temperature=0.0,
                 best_of=2,  # Try 2 candidates for better accuracy
@@ -260,6 +269,14 @@ class WhisperTranscriber:
             self.logger.error(f"Transcription failed: {e}")
             raise
     
+    def transcribe_array(self, audio: np.ndarray, sample_rate: int = 16000) -> str:
+        """Transcribe an in-memory recording, skipping the WAV write and reload"""
+        if sample_rate != whisper.audio.SAMPLE_RATE:
+            raise ValueError(f"Whisper expects {whisper.audio.SAMPLE_RATE} Hz audio, got {sample_rate} Hz")
+        
+        # Whisper takes a mono float32 array directly
+        return self.transcribe_audio_data(audio.astype(np.float32, copy=False).ravel(), sample_rate)
+    
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the loaded model"""
         if not self.model: